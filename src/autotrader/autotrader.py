@@ -1,9 +1,21 @@
+import os
+import sys
+import argparse
 import pandas as pd
-import yfinance as yf
 import matplotlib.pyplot as plt
 
+# Shared finance helpers live in src/finance_common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'finance_common'))
+from market_data import get_provider
+
+parser = argparse.ArgumentParser(description="MACD buy/sell signals for a stock.")
+parser.add_argument("--replay", nargs='?', const='', default=None, metavar="DIR", help="Replay recorded data from DIR instead of Yahoo Finance (synthetic data if DIR is omitted)")
+parser.add_argument("--replay-latency", type=float, default=0.0, help="Simulated seconds per request in replay mode")
+args = parser.parse_args()
+provider = get_provider(args.replay, args.replay_latency)
+
 # Download historical data for a stock (e.g., AAPL)
-stock_data = yf.download('NVDA', start='2024-01-30', end='2024-07-31')
+stock_data = provider.history('NVDA', start='2024-01-30', end='2024-07-31')
 
 # Calculate the MACD and Signal Line
 stock_data['EMA12'] = stock_data['Close'].ewm(span=12, adjust=False).mean()
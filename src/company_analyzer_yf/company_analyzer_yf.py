@@ -1,9 +1,18 @@
-import yfinance as yf
 import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from colorama import Fore, Style, Back, init
 import json
 import os
+import sys
+import argparse
+
+# Shared finance helpers live in src/finance_common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'finance_common'))
+from market_data import YFinanceProvider, get_provider
 
 # Initialize colorama
 init(autoreset=True)
@@ -11,15 +20,35 @@ init(autoreset=True)
 # Configure logging
 logging.basicConfig(filename='asset_monitor.log', level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Fields of the provider's metadata (yfinance's ticker.info) that change slowly, cached between refreshes
+METADATA_FIELDS = [
+    'shortName', 'currency', 'currentPrice', 'trailingPE', 'trailingEps', 'dividendYield',
+    'fiftyTwoWeekLow', 'fiftyTwoWeekHigh', 'marketCap', 'industry', 'exchangeTimezoneName'
+]
+
 class AssetMonitor:
-    def __init__(self, symbols):
+    def __init__(self, symbols, async_refresh=True, request_timeout=10, metadata_ttl=3600, prev_close_recheck=900, provider=None):
         """
         Initialize the AssetMonitor with a list of ticker symbols.
         
         Args:
         - symbols (list of str): List of company/ETF symbols (e.g., ['AAPL', 'MSFT']).
+        - async_refresh (bool): Fetch all symbols concurrently on each refresh instead of one by one.
+        - request_timeout (float): Seconds after which a symbol's fetch is reported as an error (async refresh only).
+        - metadata_ttl (float): Seconds for which the static metadata (name, P/E, 52-week range, ...) is reused.
+        - prev_close_recheck (float): Seconds between previous-close lookups while today's session has not opened yet.
+        - provider (MarketDataProvider): Source of market data (default is Yahoo Finance).
         """
         self.symbols = symbols
+        self.provider = provider or YFinanceProvider()
+        self.async_refresh = async_refresh
+        self.request_timeout = request_timeout
+        self.metadata_ttl = metadata_ttl
+        self._metadata = {}  # symbol -> (fetch time, metadata)
+        self.prev_close_recheck = prev_close_recheck
+        self._prev_close = {}  # symbol -> previous close of the current session
+        # One worker per symbol, so a whole refresh runs in parallel
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(symbols)))
         self.data = {}
         self.update_data()
         self.print_header()
@@ -28,49 +57,154 @@ class AssetMonitor:
         """
         Fetch data for all symbols and update self.data.
         """
+        if self.async_refresh:
+            asyncio.run(self.update_data_async())
+            return
         for symbol in self.symbols:
+            self.data[symbol] = self.fetch_symbol_data(symbol)
+
+    async def update_data_async(self):
+        """
+        Fetch data for all symbols concurrently, so one refresh costs roughly one round trip.
+        
+        yfinance is blocking, so every symbol is fetched in a worker thread; a symbol that does not
+        answer within request_timeout is reported as an error without delaying the others.
+        """
+        loop = asyncio.get_running_loop()
+
+        async def fetch(symbol):
             try:
-                ticker = yf.Ticker(symbol)
-                
-                # Get historical data for the last 5 days
-                history_data = ticker.history(period='5d')
-                
-                # Get other financial metrics. Everything is contained into the ticker.info data structure
-                info = ticker.info
-                currency = info.get('currency', '')
+                future = loop.run_in_executor(self._executor, self.fetch_symbol_data, symbol)
+                return await asyncio.wait_for(future, self.request_timeout)
+            except asyncio.TimeoutError:
+                logging.error(f"Timeout updating data for {symbol}")
+                return {'ticker_and_name': f"{symbol} (Timeout)", 'error': 'timeout'}
+
+        results = await asyncio.gather(*(fetch(symbol) for symbol in self.symbols))
+        # Keep the rows in the watchlist order
+        for symbol, symbol_data in zip(self.symbols, results):
+            self.data[symbol] = symbol_data
+
+    def fetch_symbol_data(self, symbol):
+        """
+        Fetch the metrics of a single symbol.
+        
+        Args:
+        - symbol (str): Ticker symbol.
+        
+        Returns:
+        - dict: Row data for the symbol (with an 'error' key if the fetch failed).
+        """
+        try:
+            # Get other financial metrics from the metadata cache; only the live price is fetched on every tick
+            info = self.get_metadata(symbol)
+            currency = info.get('currency', '')
+            current_price = self.get_live_price(symbol)
+            if current_price is None:
                 current_price = info.get('currentPrice', None)
-                pe_ratio = info.get('trailingPE', None)
-                eps = info.get('trailingEps', None)
-                dividend_yield = info.get('dividendYield', None)
-                if isinstance(dividend_yield, (int, float)):
-                    dividend_yield *= 100  # Convert to percentage
-                
-                # Get current price and calculate percent change
-                prev_close = history_data['Close'].iloc[-2] if len(history_data) > 1 else None
-                
-                if isinstance(current_price, (int, float)) and isinstance(prev_close, (int, float)) and prev_close != 0:
-                    percent_change = ((current_price - prev_close) / prev_close * 100)
-                else:
-                    percent_change = None
-
-                self.data[symbol] = {
-                    'ticker_and_name': f"{symbol} ({info.get('shortName', 'N/A')})",
-                    'currency': currency,
-                    'currentPrice': f"{currency} {current_price:.2f}" if current_price else 'N/A',
-                    'prevClose': f"{currency} {prev_close:.2f}" if prev_close else 'N/A',
-                    'percentChange': percent_change,
-                    'fiftyTwoWeekLow': f"{currency} {info.get('fiftyTwoWeekLow', None):.2f}" if info.get('fiftyTwoWeekLow', None) else 'N/A',
-                    'fiftyTwoWeekHigh': f"{currency} {info.get('fiftyTwoWeekHigh', None):.2f}" if info.get('fiftyTwoWeekHigh', None) else 'N/A',
-                    'peRatio': pe_ratio,
-                    'epsTrailingTwelveMonths': eps,
-                    'dividendYield': dividend_yield,
-                    'marketCap': self.format_number(info.get('marketCap')) if info.get('marketCap') else 'N/A',
-                    'industry': info.get('industry', 'N/A')
-                }
-                logging.info(f"Updated data for {symbol}")
-            except Exception as e:
-                logging.error(f"Error updating data for {symbol}: {str(e)}")
-                self.data[symbol] = {'ticker_and_name': f"{symbol} (Error)", 'error': str(e)}
+            pe_ratio = info.get('trailingPE', None)
+            eps = info.get('trailingEps', None)
+            dividend_yield = info.get('dividendYield', None)
+            if isinstance(dividend_yield, (int, float)):
+                dividend_yield *= 100  # Convert to percentage
+            
+            # Get the previous close (resolved once per trading session) and calculate percent change
+            prev_close = self.get_prev_close(symbol, info.get('exchangeTimezoneName'))
+            
+            if isinstance(current_price, (int, float)) and isinstance(prev_close, (int, float)) and prev_close != 0:
+                percent_change = ((current_price - prev_close) / prev_close * 100)
+            else:
+                percent_change = None
+
+            symbol_data = {
+                'ticker_and_name': f"{symbol} ({info.get('shortName', 'N/A')})",
+                'currency': currency,
+                'currentPrice': f"{currency} {current_price:.2f}" if current_price else 'N/A',
+                'prevClose': f"{currency} {prev_close:.2f}" if prev_close else 'N/A',
+                'percentChange': percent_change,
+                'fiftyTwoWeekLow': f"{currency} {info.get('fiftyTwoWeekLow', None):.2f}" if info.get('fiftyTwoWeekLow', None) else 'N/A',
+                'fiftyTwoWeekHigh': f"{currency} {info.get('fiftyTwoWeekHigh', None):.2f}" if info.get('fiftyTwoWeekHigh', None) else 'N/A',
+                'peRatio': pe_ratio,
+                'epsTrailingTwelveMonths': eps,
+                'dividendYield': dividend_yield,
+                'marketCap': self.format_number(info.get('marketCap')) if info.get('marketCap') else 'N/A',
+                'industry': info.get('industry', 'N/A')
+            }
+            logging.info(f"Updated data for {symbol}")
+            return symbol_data
+        except Exception as e:
+            logging.error(f"Error updating data for {symbol}: {str(e)}")
+            return {'ticker_and_name': f"{symbol} (Error)", 'error': str(e)}
+
+    def get_metadata(self, symbol):
+        """
+        Return the slowly changing metadata fields, downloading them at most once per metadata_ttl.
+        
+        Args:
+        - symbol (str): Ticker symbol.
+        
+        Returns:
+        - dict: The METADATA_FIELDS of the symbol's metadata.
+        """
+        cached = self._metadata.get(symbol)
+        if cached and time.time() - cached[0] < self.metadata_ttl:
+            return cached[1]
+        info = self.provider.metadata(symbol)
+        metadata = {field: info.get(field) for field in METADATA_FIELDS if info.get(field) is not None}
+        self._metadata[symbol] = (time.time(), metadata)
+        logging.info(f"Refreshed metadata for {symbol}")
+        return metadata
+
+    def get_prev_close(self, symbol, timezone=None):
+        """
+        Return the close of the session before the current one, downloading it once per trading session.
+        
+        The session rolls over on the exchange's local date. Until today's first bar shows up (before the
+        open, or on a holiday) the lookup is repeated every prev_close_recheck seconds; on weekends the
+        result is kept for the whole day.
+        
+        Args:
+        - symbol (str): Ticker symbol.
+        - timezone (str): Exchange timezone name (e.g. 'America/New_York'); local time is used if missing.
+        
+        Returns:
+        - float: Previous close, or None if there is not enough history.
+        """
+        try:
+            today = datetime.now(ZoneInfo(timezone)).date() if timezone else datetime.now().date()
+        except Exception:
+            today = datetime.now().date()
+        cached = self._prev_close.get(symbol)
+        if cached and cached['day'] == today and (cached['final'] or time.time() - cached['checked_at'] < self.prev_close_recheck):
+            return cached['prev_close']
+
+        # Get historical data for the last 5 days
+        history_data = self.provider.history(symbol, period='5d')
+        prev_close = history_data['Close'].iloc[-2] if len(history_data) > 1 else None
+        last_session = history_data.index[-1].date() if len(history_data) else None
+        self._prev_close[symbol] = {
+            'day': today,
+            'prev_close': prev_close,
+            'final': last_session == today or today.weekday() >= 5,
+            'checked_at': time.time(),
+        }
+        return prev_close
+
+    def get_live_price(self, symbol):
+        """
+        Return the last traded price from the live quote (one daily bar), a much smaller request than the metadata.
+        
+        Args:
+        - symbol (str): Ticker symbol.
+        
+        Returns:
+        - float: Last price, or None if it is not available.
+        """
+        try:
+            price = self.provider.quote(symbol, ['last_price'])['last_price']
+        except Exception:
+            return None
+        return price if isinstance(price, (int, float)) else None
 
     def format_number(self, value):
         """
@@ -234,6 +368,11 @@ class AssetMonitor:
 
 # Example usage
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live monitor of the companies in companies_list.json.")
+    parser.add_argument("--replay", nargs='?', const='', default=None, metavar="DIR", help="Replay recorded data from DIR instead of Yahoo Finance (synthetic data if DIR is omitted)")
+    parser.add_argument("--replay-latency", type=float, default=0.0, help="Simulated seconds per request in replay mode")
+    args = parser.parse_args()
+
     # Load symbols from the JSON file
     json_file_path = os.path.join(os.path.dirname(__file__), 'companies_list.json')
     with open(json_file_path, 'r') as file:
@@ -243,7 +382,7 @@ if __name__ == "__main__":
     symbols = [company['symbol'] for company in data]
 
     # Create AssetMonitor instance
-    monitor = AssetMonitor(symbols)  # Initialize with ticker symbols from the JSON file
+    monitor = AssetMonitor(symbols, provider=get_provider(args.replay, args.replay_latency))  # Initialize with ticker symbols from the JSON file
 
     # Start monitoring with updates every 1 second
     monitor.monitor(interval=1)
\ No newline at end of file
@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+
+# Rebalancing frequencies: pandas period aliases, 'D' rebalances at every close, None only when a ticker lists (buy and hold)
+REBALANCE_FREQUENCIES = {'daily': 'D', 'monthly': 'M', 'quarterly': 'Q', 'yearly': 'Y', 'never': None}
+
+
+def equal_weights(tickers):
+    """
+    Return the weights of an equally weighted basket.
+
+    Args:
+    - tickers (list of str): Tickers of the basket.
+
+    Returns:
+    - pd.Series: ticker -> weight
+    """
+    return pd.Series(1.0, index=pd.Index(tickers, name='Ticker'))
+
+
+def cap_weights(market_caps):
+    """
+    Return the weights of a cap-weighted basket, leaving out the tickers without a market cap.
+
+    Pass the basket to simulate_baskets in cap_weighted, so the weights follow the prices between rebalances.
+
+    Args:
+    - market_caps (dict): ticker -> market cap (latest quote).
+
+    Returns:
+    - pd.Series: ticker -> market cap
+    """
+    caps = pd.Series(market_caps, dtype='float64')
+    caps = caps[caps > 0]
+    caps.index.name = 'Ticker'
+    return caps
+
+
+def _anchor_rows(dates, frequency, listing_rows):
+    """
+    Rows whose close the baskets are rebalanced at: the first close of a basket ticker, then the last row
+    of every period. Buy-and-hold baskets are only rebalanced to buy a ticker on its first close.
+    """
+    if frequency == 'D' or len(listing_rows) == 0:
+        return np.arange(len(dates)) if frequency == 'D' else np.array([0])
+    if frequency is None:
+        return np.unique(listing_rows)
+    periods = pd.DatetimeIndex(dates).to_period(frequency).asi8
+    period_ends = np.flatnonzero(np.diff(periods))
+    return np.unique(np.concatenate([[listing_rows.min()], period_ends[period_ends > listing_rows.min()]]))
+
+
+def _simulate(filled, first_row, last_row, last_close, weights, scaled, anchors, base):
+    """
+    NAV of a group of baskets sharing the same rebalancing dates, as a dates x baskets matrix.
+
+    Between two rebalances each basket holds fixed quantities, so its value relative to the last
+    rebalance is one matrix product of the price ratios with the allocations of all the baskets.
+    """
+    nav = np.full((len(filled), len(weights)), np.nan)
+    value = np.full(len(weights), base)
+    invested = np.zeros(len(weights), dtype=bool)
+    ends = np.append(anchors[1:], len(filled) - 1)
+    for start, end in zip(anchors, ends):
+        # Only tickers trading at the rebalance close can be bought; delisted ones are sold
+        listed = (first_row <= start) & (start <= last_row)
+        closes = np.where(listed, filled[start].astype('float64'), 1.0)
+        target = weights * listed
+        # Cap weights at this close, assuming the share count of the latest quote
+        target[scaled] *= closes / last_close
+        totals = target.sum(axis=1)
+        allocation = np.divide(target, totals[:, None], out=np.zeros_like(target), where=totals[:, None] > 0)
+
+        # Value of 1 invested at the rebalance, for every row until the next one (a delisted ticker keeps its last close)
+        ratios = np.nan_to_num(filled[start:end + 1].astype('float64') / closes)
+        relative = ratios @ allocation.T
+        relative[:, totals == 0] = 1.0  # Nothing listed yet: the basket stays in cash
+
+        invested |= totals > 0
+        nav[start:end + 1] = np.where(invested, value * relative, np.nan)
+        value = np.where(invested, value * relative[-1], base)
+    return nav
+
+
+def simulate_baskets(close_panel, weights, rebalance='Q', cap_weighted=(), base=100.0):
+    """
+    Simulate the daily NAV of many weighted baskets of the tickers of a close panel at once.
+
+    Each basket invests on the first close of any of its tickers. At every rebalance it buys its target
+    weights, renormalized over the tickers trading on that day, and then holds the quantities until the
+    next rebalance, so its weights drift with the prices. A buy-and-hold basket (None) rebalances only
+    on the first close of each of its tickers, so tickers listed later are bought when they list. The baskets with the same rebalancing frequency are simulated together: one matrix product
+    per rebalancing period covers all of them.
+
+    Args:
+    - close_panel (pd.DataFrame): Dates x tickers closes (NaN where a ticker has no bar).
+    - weights (pd.DataFrame): Baskets x tickers target weights (they need not sum to one; missing tickers weigh 0).
+    - rebalance (str or dict): Rebalancing frequency: 'D' (every close), 'M', 'Q', 'Y' (period ends) or None (buy and hold),
+      or basket -> frequency.
+    - cap_weighted (list of str): Baskets whose weights are latest market caps: at every rebalance they are
+      scaled by the close of that day over the last close, i.e. the market cap at constant share count.
+    - base (float): NAV of every basket on its first invested day.
+
+    Returns:
+    - pd.DataFrame: Dates x baskets NAV, NaN before a basket holds any ticker.
+    """
+    weights = weights.reindex(columns=close_panel.columns).fillna(0.0).astype('float64')
+    frequencies = rebalance if isinstance(rebalance, dict) else {basket: rebalance for basket in weights.index}
+
+    # Filled in the panel's own dtype (float32 from PriceCache); each period is widened to float64 on its own
+    filled = close_panel.ffill().to_numpy()
+    valid = close_panel.notna().to_numpy()
+    has_data = valid.any(axis=0)
+    first_row = np.where(has_data, np.argmax(valid, axis=0), len(valid))
+    last_row = len(valid) - 1 - np.argmax(valid[::-1], axis=0)
+    last_close = np.where(has_data, filled[-1].astype('float64'), 1.0)
+    scaled = weights.index.isin(list(cap_weighted))
+
+    nav = np.full((len(close_panel), len(weights)), np.nan)
+    for frequency in dict.fromkeys(frequencies[basket] for basket in weights.index):
+        group = np.array([frequencies[basket] == frequency for basket in weights.index])
+        # First closes of the tickers held by any basket of the group
+        held = (weights.to_numpy()[group] != 0).any(axis=0) & has_data
+        anchors = _anchor_rows(close_panel.index, frequency, first_row[held])
+        nav[:, group] = _simulate(filled, first_row, last_row, last_close, weights.to_numpy()[group], scaled[group], anchors, base)
+    return pd.DataFrame(nav, index=close_panel.index, columns=weights.index)
@@ -0,0 +1,57 @@
+import time
+from market_data import YFinanceProvider, NO_DATA
+
+
+def chunked(items, chunk_size):
+    """
+    Split a list into consecutive chunks of at most chunk_size items.
+    """
+    return [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+
+def download_batched(tickers, chunk_size=100, limiter=None, provider=None, retries=0, backoff=1.0, transient=None, **kwargs):
+    """
+    Download daily bars for many tickers with one batched request per chunk.
+
+    A ticker that fails (delisted, bad symbol, empty history) is reported in the failures
+    dictionary and does not abort the rest of its chunk. Tickers of a chunk that failed for a
+    transient reason (timeout, throttling, or the whole request raising) are requested again
+    together, with exponential backoff.
+
+    Args:
+    - tickers (list of str): Ticker symbols.
+    - chunk_size (int): Number of tickers per request.
+    - limiter (TokenBucket): Rate limiter acquired before each request (None for no limit).
+    - provider (MarketDataProvider): Data source (default is Yahoo Finance).
+    - retries (int): Extra requests for the tickers of a chunk that failed for a transient reason.
+    - backoff (float): Wait before the first retry, in seconds; doubled at every further retry.
+    - transient (callable): Called with a failure message, True if the ticker is worth requesting again
+      (default is every failure but an empty result).
+    - **kwargs: Passed to provider.download (e.g. period="max" or start="2024-01-01").
+
+    Returns:
+    - tuple: (dict ticker -> DataFrame of bars, dict ticker -> failure reason)
+    """
+    provider = provider or YFinanceProvider()
+    transient = transient or (lambda reason: reason != NO_DATA)
+    frames = {}
+    failures = {}
+    for chunk in chunked(list(tickers), chunk_size):
+        pending = chunk
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(backoff * 2 ** (attempt - 1))
+            if limiter:
+                limiter.acquire()
+            try:
+                chunk_frames, chunk_failures = provider.download(pending, **kwargs)
+            except Exception as e:
+                chunk_frames, chunk_failures = {}, {ticker: str(e) for ticker in pending}
+            frames.update(chunk_frames)
+            pending = [ticker for ticker, reason in chunk_failures.items() if transient(reason)]
+            if attempt == retries:
+                pending = []
+            failures.update({ticker: reason for ticker, reason in chunk_failures.items() if ticker not in pending})
+            if not pending:
+                break
+    return frames, failures
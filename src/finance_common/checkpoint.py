@@ -0,0 +1,102 @@
+import os
+import json
+import threading
+
+
+class RunCheckpoint:
+    def __init__(self, name, checkpoint_dir=None, resume=False):
+        """
+        Per-ticker progress of an analyzer run, appended to a JSON-lines file as each ticker completes.
+
+        If the run dies (throttling, network blip, Ctrl-C), running it again with resume=True skips
+        the tickers already completed instead of starting over.
+
+        Args:
+        - name (str): Name of the run (e.g. 'sp500'); one checkpoint file per name.
+        - checkpoint_dir (str): Folder of the checkpoint files (default is ~/.finance_cache/checkpoints).
+        - resume (bool): Load the progress of the previous run instead of starting from scratch.
+        """
+        self.checkpoint_dir = checkpoint_dir or os.path.join(os.path.expanduser('~/.finance_cache'), 'checkpoints')
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        self.path = os.path.join(self.checkpoint_dir, f"{name}.jsonl")
+        self.retry_path = os.path.join(self.checkpoint_dir, f"{name}_retry.txt")
+        self._lock = threading.Lock()
+        self._results = {}   # step -> {ticker: value}
+        self._failures = {}  # step -> {ticker: error}
+        if resume and os.path.exists(self.path):
+            self._load()
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _load(self):
+        with open(self.path, 'r') as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Last line cut short by the crash
+                if entry.get('error') is None:
+                    self._results.setdefault(entry['step'], {})[entry['ticker']] = entry.get('value')
+                    self._failures.get(entry['step'], {}).pop(entry['ticker'], None)
+                else:
+                    self._failures.setdefault(entry['step'], {})[entry['ticker']] = entry['error']
+
+    def done(self, step, ticker):
+        """
+        Return True if the ticker already completed the step.
+        """
+        return ticker in self._results.get(step, {})
+
+    def pending(self, step, tickers):
+        """
+        Return the tickers that still have to go through the step, in their original order.
+        """
+        return [ticker for ticker in tickers if not self.done(step, ticker)]
+
+    def results(self, step):
+        """
+        Return the recorded values of a step (ticker -> value).
+        """
+        return dict(self._results.get(step, {}))
+
+    def record(self, step, ticker, value=None, error=None):
+        """
+        Save the outcome of one ticker for a step. Thread-safe, and written to disk immediately.
+
+        Args:
+        - step (str): Name of the step (e.g. 'market_cap').
+        - ticker (str): Ticker symbol.
+        - value: JSON-serializable result (ignored if error is set).
+        - error (str): Failure reason, or None if the ticker succeeded.
+        """
+        entry = {'step': step, 'ticker': ticker, 'value': value, 'error': error}
+        with self._lock:
+            if error is None:
+                self._results.setdefault(step, {})[ticker] = value
+                self._failures.get(step, {}).pop(ticker, None)
+            else:
+                self._failures.setdefault(step, {})[ticker] = error
+            with open(self.path, 'a') as file:
+                file.write(json.dumps(entry, default=float) + '\n')
+
+    def write_retry_list(self):
+        """
+        Write the tickers that failed a step to the retry list (one 'step<TAB>ticker<TAB>error' line each).
+
+        Returns:
+        - int: Number of failed tickers.
+        """
+        lines = [f"{step}\t{ticker}\t{error}" for step, failures in self._failures.items() for ticker, error in failures.items()]
+        with open(self.retry_path, 'w') as file:
+            file.write('\n'.join(lines) + ('\n' if lines else ''))
+        return len(lines)
+
+    def finish(self):
+        """
+        Close a completed run: write the retry list and remove the progress file, so the next run starts fresh.
+        """
+        failed = self.write_retry_list()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        if failed:
+            print(f"{failed} failed tickers written to {self.retry_path}")
@@ -0,0 +1,47 @@
+import pandas as pd
+
+# Supported columnar formats and their file extensions
+COLUMNAR_FORMATS = {'parquet': 'parquet', 'feather': 'arrow', 'csv': 'csv'}
+
+
+def write_columnar_report(base_name, df, formats=('parquet',), text_columns=('Ticker', 'Company Name')):
+    """
+    Write a report table in columnar formats, for downstream jobs that should not parse Excel.
+
+    Every column other than text_columns is stored as float64 (growth percentages, raw market caps),
+    and column names are strings, as Parquet and Arrow require. Parquet and Arrow need pyarrow; if it
+    is missing those formats are skipped with a message.
+
+    Args:
+    - base_name (str): Output path without extension (e.g. 'SP500_Annual_Growth').
+    - df (pd.DataFrame): Report table with numeric (unformatted) values.
+    - formats (list of str): Any of 'parquet', 'feather' (Arrow IPC) and 'csv'.
+    - text_columns (list of str): Columns kept as strings.
+
+    Returns:
+    - list of str: Paths of the written files.
+    """
+    table = df.copy()
+    table.columns = [str(col) for col in table.columns]
+    for col in table.columns:
+        if col in text_columns:
+            table[col] = table[col].astype('string')
+        else:
+            table[col] = pd.to_numeric(table[col], errors='coerce').astype('float64')
+    table = table.reset_index(drop=True)
+
+    written = []
+    for fmt in formats:
+        path = f"{base_name}.{COLUMNAR_FORMATS[fmt]}"
+        try:
+            if fmt == 'parquet':
+                table.to_parquet(path, index=False)
+            elif fmt == 'feather':
+                table.to_feather(path)
+            else:
+                table.to_csv(path, index=False)
+        except ImportError as e:
+            print(f"Skipping {fmt} output ({e})")
+            continue
+        written.append(path)
+    return written
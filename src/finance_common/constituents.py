@@ -0,0 +1,137 @@
+import io
+import os
+import json
+import time
+import requests
+import pandas as pd
+from lxml import html as lxml_html
+
+# Wikipedia rejects requests without a descriptive User-Agent
+USER_AGENT = 'pyutils-index-analyzer/1.0 (https://github.com/FraH90/pyutils)'
+
+
+class ConstituentSource:
+    def __init__(self, name, url, ticker_columns, name_columns, table_id='constituents', cache_dir=None, ttl_hours=24, timeout=30):
+        """
+        Constituent list of an index, parsed from a Wikipedia table and cached locally.
+
+        Within the TTL the list is read from the cache without any request. After it, the page is
+        revalidated with its ETag/Last-Modified, so an unchanged page costs a 304 and no parsing.
+
+        Args:
+        - name (str): Name of the list, used for the cache file (e.g. 'sp500').
+        - url (str): Wikipedia page holding the constituents table.
+        - ticker_columns (list of str): Possible names of the ticker column, in order of preference.
+        - name_columns (list of str): Possible names of the company name column, in order of preference.
+        - table_id (str): id attribute of the target table, when the page has one.
+        - cache_dir (str): Folder of the cache files (default is ~/.finance_cache/constituents).
+        - ttl_hours (float): Age after which the cached list is revalidated.
+        - timeout (float): Timeout of the page request, in seconds.
+        """
+        self.name = name
+        self.url = url
+        self.ticker_columns = ticker_columns
+        self.name_columns = name_columns
+        self.table_id = table_id
+        self.cache_dir = cache_dir or os.path.join(os.path.expanduser('~/.finance_cache'), 'constituents')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.path = os.path.join(self.cache_dir, f"{name}.json")
+        self.ttl_hours = ttl_hours
+        self.timeout = timeout
+
+    def _read_cache(self):
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r') as file:
+                return json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def _write_cache(self, cached):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(cached, file, indent=2)
+        os.replace(temp_path, self.path)
+
+    def _pick_columns(self, columns):
+        ticker_column = next((col for col in self.ticker_columns if col in columns), None)
+        name_column = next((col for col in self.name_columns if col in columns), None)
+        return ticker_column, name_column
+
+    def _find_table(self, page):
+        """
+        Return the constituents table element: the one with table_id, else the first whose header has both columns.
+        """
+        document = lxml_html.fromstring(page)
+        if self.table_id:
+            tables = document.xpath('//table[@id=$id]', id=self.table_id)
+            if tables:
+                return tables[0]
+        for table in document.xpath('//table'):
+            header = [cell.text_content().strip() for cell in table.xpath('.//tr[1]/th')]
+            if all(self._pick_columns(header)):
+                return table
+        return None
+
+    def parse(self, page):
+        """
+        Parse the constituents out of the page, converting only the target table.
+
+        Args:
+        - page (str): HTML of the Wikipedia page.
+
+        Returns:
+        - list of [ticker, company name] pairs
+        """
+        table = self._find_table(page)
+        if table is None:
+            raise ValueError(f"Could not find the {self.name} table on {self.url}")
+        df = pd.read_html(io.StringIO(lxml_html.tostring(table, encoding='unicode')))[0]
+        ticker_column, name_column = self._pick_columns(df.columns.tolist())
+        if ticker_column is None or name_column is None:
+            raise ValueError(f"Could not find the ticker and company name columns of the {self.name} table on {self.url}")
+        return [[ticker, name] for ticker, name in zip(df[ticker_column], df[name_column])
+                if isinstance(ticker, str) and isinstance(name, str)]
+
+    def get(self):
+        """
+        Return the constituents, from the cache when it is fresh or the page has not changed.
+
+        If the page cannot be reached, a stale cached list is used rather than failing the run.
+
+        Returns:
+        - list of [ticker, company name] pairs, in the order of the Wikipedia table
+        """
+        cached = self._read_cache()
+        if cached and cached.get('url') == self.url and time.time() - cached['checked_at'] < self.ttl_hours * 3600:
+            return cached['rows']
+
+        headers = {'User-Agent': USER_AGENT}
+        if cached and cached.get('url') == self.url:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+        try:
+            response = requests.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and cached:
+                cached['checked_at'] = time.time()
+                self._write_cache(cached)
+                return cached['rows']
+            response.raise_for_status()
+        except requests.RequestException as e:
+            if cached:
+                print(f"Could not refresh the {self.name} constituents ({e}), using the cached list.")
+                return cached['rows']
+            raise
+
+        rows = self.parse(response.text)
+        self._write_cache({
+            'url': self.url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'checked_at': time.time(),
+            'rows': rows,
+        })
+        return rows
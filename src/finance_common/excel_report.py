@@ -0,0 +1,123 @@
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import PatternFill, Border, Side, Alignment, Font, NamedStyle
+from openpyxl.formatting.rule import FormulaRule
+from openpyxl.utils import get_column_letter
+from run_profile import RunProfile
+
+# Heatmap bands of the growth reports: (condition on the cell value, fill color)
+# The conditions use {cell} as a placeholder for the top-left cell of the formatted range
+HEATMAP_BANDS = [
+    ("{cell}>0,{cell}<=5", "e2f0d9"),     # Very light green
+    ("{cell}>5,{cell}<=10", "c6e0b4"),    # Light green
+    ("{cell}>10,{cell}<=20", "a9d08e"),   # Medium green
+    ("{cell}>20,{cell}<=50", "70ad47"),   # Dark green
+    ("{cell}>50", "548235"),              # Darkest green
+    ("{cell}<0,{cell}>=-5", "f4cccc"),    # Very light red
+    ("{cell}<-5,{cell}>=-10", "ea9999"),  # Light red
+    ("{cell}<-10,{cell}>=-20", "e06666"), # Medium red
+    ("{cell}<-20,{cell}>=-50", "cc0000"), # Dark red
+    ("{cell}<-50", "990000"),             # Darkest red
+]
+
+thin_border = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+center_alignment = Alignment(horizontal='center', vertical='center')
+
+
+def register_report_styles(workbook):
+    """
+    Add the named styles of the growth reports to a workbook (once), so each cell only references a style.
+
+    Args:
+    - workbook (openpyxl.Workbook): Workbook to add the styles to.
+    """
+    existing = set(workbook.named_styles)
+    styles = [
+        NamedStyle(name='report_header', font=Font(bold=True), border=thin_border, alignment=center_alignment),
+        NamedStyle(name='report_cell', border=thin_border, alignment=center_alignment),
+        NamedStyle(name='report_number', border=thin_border, alignment=center_alignment, number_format='0.0'),
+        NamedStyle(name='report_ratio', border=thin_border, alignment=center_alignment, number_format='0.00'),
+    ]
+    for style in styles:
+        if style.name not in existing:
+            workbook.add_named_style(style)
+
+
+def add_heatmap_formatting(sheet, cell_range):
+    """
+    Color a range with the green/red growth bands, using one worksheet-level conditional formatting rule per band.
+
+    The cost does not depend on the number of cells, and text or empty cells are left unfilled.
+
+    Args:
+    - sheet (openpyxl worksheet): Sheet to format (regular or write-only).
+    - cell_range (str): Range to format, e.g. 'D2:AL504'.
+    """
+    first_cell = cell_range.split(':')[0]
+    for condition, color in HEATMAP_BANDS:
+        formula = f"AND(ISNUMBER({first_cell}),{condition.format(cell=first_cell)})"
+        fill = PatternFill(start_color=color, end_color=color, fill_type="solid")
+        sheet.conditional_formatting.add(cell_range, FormulaRule(formula=[formula], fill=fill))
+
+
+def _append_table(sheet, df, styles, column_widths=None):
+    """
+    Stream a table into a write-only sheet: header row, then one row per DataFrame row, each cell with its named style.
+    """
+    # Column widths must be set before the first row of a write-only sheet
+    for letter, width in (column_widths or {}).items():
+        sheet.column_dimensions[letter].width = width
+
+    def styled(value, style):
+        cell = WriteOnlyCell(sheet, value=None if pd.isna(value) else value)
+        cell.style = style
+        return cell
+
+    sheet.append([styled(name, 'report_header') for name in df.columns])
+    for values in df.itertuples(index=False, name=None):
+        sheet.append([styled(value, style) for value, style in zip(values, styles)])
+
+
+def write_growth_report(file_name, df, data_col_start, sheet_name="Growth", column_widths=None, extra_sheets=None, profile=None):
+    """
+    Write a growth report with a write-only (streaming) workbook.
+
+    Each row is written with its styles as it is produced and flushed to disk, so memory stays flat
+    however many tickers the report has: bordered, centered cells with one-decimal growth columns,
+    and the heatmap bands as worksheet-level rules.
+
+    Args:
+    - file_name (str): Path of the .xlsx file.
+    - df (pd.DataFrame): Report table; its columns become the header row.
+    - data_col_start (int): First column (1-based) holding growth percentages.
+    - sheet_name (str): Name of the sheet.
+    - column_widths (dict): Column letter -> width, e.g. {'B': 30} (also used by the extra sheets).
+    - extra_sheets (list of tuple): (sheet name, DataFrame, dict column -> style name) of further tables without
+      heatmap; columns missing from the dict get 'report_number' if numeric, else 'report_cell'.
+    - profile (RunProfile): Run profile receiving the 'excel_write' and 'styling' stage times.
+    """
+    profile = profile or RunProfile()
+    workbook = Workbook(write_only=True)
+    register_report_styles(workbook)
+    sheet = workbook.create_sheet(sheet_name)
+
+    with profile.stage('excel_write'):
+        styles = ['report_number' if col >= data_col_start else 'report_cell' for col in range(1, len(df.columns) + 1)]
+        _append_table(sheet, df, styles, column_widths)
+
+    with profile.stage('styling'):
+        if len(df) and len(df.columns) >= data_col_start:
+            add_heatmap_formatting(sheet, f"{get_column_letter(data_col_start)}2:{get_column_letter(len(df.columns))}{len(df) + 1}")
+
+    with profile.stage('excel_write'):
+        for extra_name, extra_df, column_styles in extra_sheets or []:
+            styles = [column_styles.get(column) or ('report_number' if pd.api.types.is_numeric_dtype(extra_df[column]) else 'report_cell')
+                      for column in extra_df.columns]
+            _append_table(workbook.create_sheet(extra_name), extra_df, styles, column_widths)
+        workbook.save(file_name)
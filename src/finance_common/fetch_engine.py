@@ -0,0 +1,114 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        """
+        Thread-safe token bucket, used to keep the request rate under Yahoo's throttling.
+
+        Args:
+        - rate (float): Tokens added per second (None or 0 disables the limit).
+        - capacity (float): Maximum burst size (default is one second worth of tokens).
+        """
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate or 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until a token is available, then consume it.
+        """
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchEngine:
+    def __init__(self, max_workers=8, limiter=None, retries=0, backoff=1.0):
+        """
+        Run a per-ticker fetch function on a bounded thread pool.
+
+        Args:
+        - max_workers (int): Number of worker threads.
+        - limiter (TokenBucket): Shared rate limiter, acquired once per throttled call (None for no limit).
+        - retries (int): Extra attempts for a ticker whose fetch raised an exception.
+        - backoff (float): Wait before the first retry, in seconds; doubled at every further retry.
+        """
+        self.max_workers = max_workers
+        self.limiter = limiter
+        self.retries = retries
+        self.backoff = backoff
+        self.timings = {}  # fetch name -> {ticker: seconds}
+
+    def run(self, fetch, tickers, throttled=True, name=None, on_result=None):
+        """
+        Call fetch(ticker) for every ticker concurrently.
+
+        A failing ticker is retried with exponential backoff; if it keeps failing it does not stop
+        the others: its result is None and the error is reported.
+
+        Args:
+        - fetch (callable): Function taking a ticker and returning its data.
+        - tickers (list of str): Ticker symbols.
+        - throttled (bool): Acquire a limiter token before each call. Pass False when fetch throttles its own requests.
+        - name (str): Key of the timings entry (default is the function name).
+        - on_result (callable): Called as on_result(ticker, result, error) as soon as a ticker is done (e.g. to checkpoint it).
+
+        Returns:
+        - tuple: (dict ticker -> result in ticker order, dict ticker -> error message)
+        """
+        name = name or getattr(fetch, '__name__', 'fetch')
+        timings = self.timings.setdefault(name, {})
+
+        def call(ticker):
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    time.sleep(self.backoff * 2 ** (attempt - 1))
+                if throttled and self.limiter:
+                    self.limiter.acquire()
+                start = time.perf_counter()
+                try:
+                    result, error = fetch(ticker), None
+                except Exception as e:
+                    result, error = None, str(e)
+                timings[ticker] = time.perf_counter() - start
+                if error is None:
+                    break
+            if on_result:
+                on_result(ticker, result, error)
+            return result, error
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            outcomes = list(executor.map(call, tickers))
+
+        results = {}
+        errors = {}
+        for ticker, (result, error) in zip(tickers, outcomes):
+            results[ticker] = result
+            if error is not None:
+                errors[ticker] = error
+        return results, errors
+
+    def report(self, name):
+        """
+        Print a one-line timing summary of a previous run.
+        """
+        timings = self.timings.get(name, {})
+        if not timings:
+            return
+        slowest = max(timings, key=timings.get)
+        print(f"{name}: {len(timings)} tickers, {sum(timings.values()):.1f}s of fetch time, "
+              f"slowest {slowest} ({timings[slowest]:.2f}s)")
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+# Trading currency of the Yahoo exchange suffixes; symbols without a suffix (US listings, ADRs) trade in USD
+SUFFIX_CURRENCIES = {
+    'AS': 'EUR', 'AT': 'EUR', 'AX': 'AUD', 'BA': 'ARS', 'BE': 'EUR', 'BK': 'THB', 'BO': 'INR', 'BR': 'EUR',
+    'CN': 'CAD', 'CO': 'DKK', 'DE': 'EUR', 'DU': 'EUR', 'F': 'EUR', 'HE': 'EUR', 'HK': 'HKD', 'HM': 'EUR',
+    'IR': 'EUR', 'IS': 'TRY', 'JK': 'IDR', 'JO': 'ZAR', 'KL': 'MYR', 'KQ': 'KRW', 'KS': 'KRW', 'L': 'GBP',
+    'LS': 'EUR', 'MC': 'EUR', 'ME': 'RUB', 'MI': 'EUR', 'MU': 'EUR', 'MX': 'MXN', 'NE': 'CAD', 'NS': 'INR',
+    'NZ': 'NZD', 'OL': 'NOK', 'PA': 'EUR', 'PR': 'CZK', 'SA': 'BRL', 'SG': 'EUR', 'SI': 'SGD', 'SR': 'SAR',
+    'SS': 'CNY', 'ST': 'SEK', 'SW': 'CHF', 'SZ': 'CNY', 'T': 'JPY', 'TA': 'ILS', 'TO': 'CAD', 'TW': 'TWD',
+    'TWO': 'TWD', 'V': 'CAD', 'VI': 'EUR', 'WA': 'PLN',
+}
+
+# Exchanges quoted in the minor unit of their currency (pence, cents, agorot)
+MINOR_UNIT_SUFFIXES = {'L', 'JO', 'TA'}
+
+
+def ticker_currency(ticker):
+    """
+    Return the trading currency of a Yahoo symbol from its exchange suffix, without any request.
+
+    Args:
+    - ticker (str): Yahoo symbol, e.g. '2357.TW'.
+
+    Returns:
+    - str: ISO currency code ('USD' for symbols without a known suffix).
+    """
+    suffix = ticker.rsplit('.', 1)[1] if '.' in ticker else None
+    return SUFFIX_CURRENCIES.get(suffix, 'USD')
+
+
+def fx_ticker(currency, base):
+    """
+    Return the Yahoo symbol of the daily rate of a currency in the base currency, e.g. 'TWDUSD=X'.
+    """
+    return f"{currency}{base}=X"
+
+
+def fx_pairs(tickers, base='USD'):
+    """
+    Return the FX series needed to convert the closes of some tickers to the base currency, one per currency.
+
+    Args:
+    - tickers (list of str): Yahoo symbols.
+    - base (str): Currency of the converted closes.
+
+    Returns:
+    - dict: currency -> FX symbol (empty if every ticker trades in the base currency)
+    """
+    currencies = dict.fromkeys(ticker_currency(ticker) for ticker in tickers)
+    return {currency: fx_ticker(currency, base) for currency in currencies if currency != base}
+
+
+def _aligned_rates(fx_closes, dates):
+    """
+    Align the FX closes to the dates of a panel, carrying the last rate over the days without one.
+    """
+    rates = fx_closes.reindex(fx_closes.index.union(dates)).ffill().reindex(dates)
+    return rates.astype('float64')
+
+
+def convert_panel(close_panel, fx_closes, base='USD'):
+    """
+    Convert a dates x tickers close panel to the base currency, one multiplication per currency.
+
+    The closes of all the tickers of a currency are multiplied at once by the FX series aligned to the
+    panel dates; tickers already in the base currency are copied unchanged. Closes before the first
+    FX rate of their currency become NaN.
+
+    Args:
+    - close_panel (pd.DataFrame): Dates x tickers closes in local currency.
+    - fx_closes (pd.DataFrame): Dates x FX symbols closes (see fx_pairs), e.g. from PriceCache.close_panel.
+    - base (str): Currency of the converted closes.
+
+    Returns:
+    - pd.DataFrame: Dates x tickers closes in the base currency, in the dtype of the panel.
+    """
+    currencies = np.array([ticker_currency(ticker) for ticker in close_panel.columns])
+    if (currencies == base).all():
+        return close_panel
+    rates = _aligned_rates(fx_closes, close_panel.index)
+    values = close_panel.to_numpy(copy=True)
+    for currency in dict.fromkeys(currencies[currencies != base]):
+        columns = np.flatnonzero(currencies == currency)
+        pair = fx_ticker(currency, base)
+        if pair not in rates.columns:
+            print(f"No {pair} rates, {len(columns)} tickers in {currency} left out of the reports.")
+            values[:, columns] = np.nan
+            continue
+        values[:, columns] *= rates[pair].to_numpy()[:, None]
+
+    minor_units = [ticker.rsplit('.', 1)[-1] in MINOR_UNIT_SUFFIXES for ticker in close_panel.columns]
+    values[:, np.flatnonzero(minor_units)] /= 100
+    return pd.DataFrame(values, index=close_panel.index, columns=close_panel.columns, copy=False)
+
+
+def convert_amounts(amounts, fx_closes, base='USD'):
+    """
+    Convert per-ticker amounts quoted today (e.g. market caps) to the base currency at the latest FX rate.
+
+    Args:
+    - amounts (dict): ticker -> amount in local currency (None is kept).
+    - fx_closes (pd.DataFrame): Dates x FX symbols closes; None when every ticker trades in the base currency.
+    - base (str): Currency of the converted amounts.
+
+    Returns:
+    - dict: ticker -> amount in the base currency (None when no rate is known)
+    """
+    if fx_closes is None:
+        return amounts
+    latest = fx_closes.ffill().iloc[-1] if len(fx_closes) else pd.Series(dtype='float64')
+    converted = {}
+    for ticker, amount in amounts.items():
+        currency = ticker_currency(ticker)
+        if amount is None or currency == base:
+            converted[ticker] = amount
+            continue
+        rate = latest.get(fx_ticker(currency, base), np.nan)
+        converted[ticker] = None if pd.isna(rate) else float(amount) * float(rate)
+    return converted
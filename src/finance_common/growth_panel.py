@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+
+# pandas 2.2 renamed the period-end frequencies from 'Y'/'Q'/'M' to 'YE'/'QE'/'ME'
+try:
+    pd.tseries.frequencies.to_offset('YE')
+    YEAR_END, QUARTER_END, MONTH_END = 'YE', 'QE', 'ME'
+except ValueError:
+    YEAR_END, QUARTER_END, MONTH_END = 'Y', 'Q', 'M'
+
+# Granularities of the period heatmaps: (resampling frequency, column label format)
+PERIOD_GRANULARITIES = {
+    'quarterly': (QUARTER_END, lambda dates: [f"{date.year}Q{date.quarter}" for date in dates]),
+    'monthly': (MONTH_END, lambda dates: dates.strftime('%Y-%m').tolist()),
+}
+
+
+def yearly_growth(close_panel, years, decimals=1):
+    """
+    Compute the calendar-year growth of every ticker of a close panel in one vectorized pass.
+
+    Each year's growth is the change between the last close of the year and the last close of the
+    previous year, in percent. Tickers without any close are left out.
+
+    Args:
+    - close_panel (pd.DataFrame): Dates x tickers matrix of closes (NaN where a ticker has no bar), float32 or float64.
+    - years (list of int): Years to report (columns of the result).
+    - decimals (int): Rounding of the percentages.
+
+    Returns:
+    - pd.DataFrame: Tickers x years growth in percent, NaN where a year is not covered.
+    """
+    # Resample first: only the small years x tickers frame is copied, never the daily panel,
+    # and the percentages of a float32 panel are computed in float64
+    yearly_close = close_panel.resample(YEAR_END).last().dropna(axis=1, how='all').astype('float64')
+    growth = yearly_close.pct_change(fill_method=None) * 100
+    growth.index = growth.index.year
+    growth = growth.reindex(years).round(decimals).T
+    growth.index.name = 'Ticker'
+    growth.columns.name = None
+    return growth
+
+
+def period_growth(close_panel, granularity, years, decimals=1):
+    """
+    Compute the quarterly or monthly growth of every ticker of a close panel in one vectorized pass.
+
+    Same method as yearly_growth, at a finer granularity: each period's growth is the change between
+    the last close of the period and the last close of the previous one, in percent.
+
+    Args:
+    - close_panel (pd.DataFrame): Dates x tickers matrix of closes (NaN where a ticker has no bar), float32 or float64.
+    - granularity (str): 'quarterly' or 'monthly' (keys of PERIOD_GRANULARITIES).
+    - years (list of int): Years to report; all their periods become columns.
+    - decimals (int): Rounding of the percentages.
+
+    Returns:
+    - pd.DataFrame: Tickers x periods growth in percent, with labels such as '2024Q1' or '2024-03'.
+    """
+    frequency, labels = PERIOD_GRANULARITIES[granularity]
+    period_close = close_panel.resample(frequency).last().dropna(axis=1, how='all').astype('float64')
+    growth = period_close.pct_change(fill_method=None) * 100
+
+    # Every period of the requested years, including those before the first close
+    periods = pd.date_range(f"{min(years)}-01-01", f"{max(years)}-12-31", freq=frequency)
+    periods = periods[periods.year.isin(years)]
+    growth = growth.reindex(periods).round(decimals).T
+    growth.columns = labels(periods)
+    growth.index.name = 'Ticker'
+    return growth
+
+
+def _total_return_chunk(closes, dividends):
+    has_close = ~np.isnan(closes)
+    columns = np.arange(closes.shape[1])
+
+    # Previous available close of every row (NaN up to the first close)
+    rows = np.where(has_close, np.arange(len(closes))[:, None], 0)
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    previous = np.full_like(closes, np.nan)
+    previous[1:] = closes[rows[:-1], columns]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = (closes + np.nan_to_num(dividends)) / previous
+    growth[~np.isfinite(growth)] = 1.0  # First close, and rows without a close
+    index = np.cumprod(growth, axis=0) * closes[np.argmax(has_close, axis=0), columns]
+    index[~has_close] = np.nan
+    return index
+
+
+def total_return_index(close_panel, dividend_panel, chunk_size=500):
+    """
+    Build a dividend-reinvested return index from the closes and the cash dividends, with one cumulative product.
+
+    Each day's total return is (close + dividend) / previous close - 1, the previous close being the
+    last available one of the ticker. The index starts at the first close of each ticker, so it can
+    be read like a price; splits need no handling, as Yahoo's Close and Dividends are split-adjusted.
+
+    Args:
+    - close_panel (pd.DataFrame): Dates x tickers unadjusted closes ('Close' column of the cache).
+    - dividend_panel (pd.DataFrame): Dates x tickers dividends per share ('Dividends' column), same tickers.
+    - chunk_size (int): Tickers computed at a time in float64, to bound the memory of large panels.
+
+    Returns:
+    - pd.DataFrame: Dates x tickers return index in the dtype of close_panel, NaN where a ticker has no close.
+    """
+    dividend_panel = dividend_panel.reindex(index=close_panel.index, columns=close_panel.columns)
+    values = np.empty(close_panel.shape, dtype=close_panel.to_numpy().dtype, order='F')
+    for start in range(0, close_panel.shape[1], chunk_size):
+        stop = start + chunk_size
+        values[:, start:stop] = _total_return_chunk(close_panel.iloc[:, start:stop].to_numpy(dtype='float64'),
+                                                    dividend_panel.iloc[:, start:stop].to_numpy(dtype='float64'))
+    return pd.DataFrame(values, index=close_panel.index, columns=close_panel.columns, copy=False)
@@ -0,0 +1,449 @@
+import os
+import pandas as pd
+from openpyxl.utils import get_column_letter
+from constituents import ConstituentSource
+from symbols import SymbolResolver
+from excel_report import write_growth_report
+from columnar_export import COLUMNAR_FORMATS, write_columnar_report
+from run_profile import RunProfile
+from growth_panel import PERIOD_GRANULARITIES, yearly_growth, period_growth, total_return_index
+from basket import REBALANCE_FREQUENCIES, equal_weights, cap_weights, simulate_baskets
+from fx import fx_pairs, convert_panel
+
+# Wikipedia tables of the index constituents (ConstituentSource arguments)
+SP500_SOURCE = {
+    'name': 'sp500',
+    'url': 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies',
+    'ticker_columns': ['Symbol', 'Ticker', 'Ticker symbol'],
+    'name_columns': ['Security', 'Company', 'Company Name', 'Name'],
+}
+NASDAQ100_SOURCE = {
+    'name': 'nasdaq100',
+    'url': 'https://en.wikipedia.org/wiki/NASDAQ-100',
+    'ticker_columns': ['Ticker', 'Ticker symbol', 'Symbol'],
+    'name_columns': ['Company', 'Security', 'Name'],
+}
+
+# Hardcoded list of ticker symbols of the quantum computing report
+QUANTUM_TICKERS = [
+    'IONQ', 'MSTR', 'QBTS', 'RGTI', 'COHR', 'RDNT', '2357.TW', 'MRVL', 'ACN', 'IBM',
+    'TXN', 'HPE', 'NTTYY', '6503.T', 'KPN', 'GOOGL', 'ORAN', 'ABB', 'CDNS', '2454.TW',
+    'MSFT', 'SNPS', 'NVEC', 'ADI', 'EADSY', 'ON', 'BIDU', 'AMD', 'TDC', '3661.TW',
+    'CRUS', 'MKSI', 'LSCC', 'SYNA', 'KLAC', 'NXPI', 'INTC', 'REY.MI', 'NOC', 'WIT',
+    'LMT', 'BABA', 'BAH', 'TSEM', 'NOK', 'NVDA', 'HTHIY', '9613.T', 'RTX', 'FJTSY',
+    'HON', 'TSM', 'JNPR', '6701.T'
+]
+
+# Price series the growth is computed from: Yahoo's dividend-adjusted close, the plain close (price
+# return), or a dividend-reinvested index built from the cached Close and Dividends (see read_close_panel)
+PRICE_MODES = ['adjusted', 'price', 'total']
+
+# Basket rows of the watchlist report, simulated on the daily closes (see etf_baskets)
+EQUAL_WEIGHT_BASKET = 'Equal Weight (ETF)'
+CAP_WEIGHT_BASKET = 'Cap Weight (ETF)'
+
+# Output files of the reports
+SP500_FILE = "SP500_Annual_Growth.xlsx"
+NASDAQ100_FILE = "NASDAQ_100_Annual_Growth.xlsx"
+QUANTUM_FILE = "Stock_Annual_Growth.xlsx"
+
+
+def currency_code(value):
+    """
+    Normalize a --currency value: ISO codes are upper-cased (eur -> EUR), 'local' is kept as is.
+    """
+    return 'local' if value.lower() == 'local' else value.upper()
+
+
+def add_fetch_arguments(parser):
+    """
+    Add the command-line options shared by the index analyzers (fetching, replay, outputs, checkpoints).
+
+    Args:
+    - parser (argparse.ArgumentParser): Parser of the script.
+    """
+    parser.add_argument("--batch-size", type=int, default=100, help="Tickers per batched download request (0 downloads them one by one)")
+    parser.add_argument("--workers", type=int, default=8, help="Number of concurrent per-ticker requests")
+    parser.add_argument("--rate", type=float, default=5.0, help="Maximum requests per second sent to Yahoo (0 for no limit)")
+    parser.add_argument("--replay", nargs='?', const='', default=None, metavar="DIR", help="Replay recorded data from DIR instead of Yahoo Finance (synthetic data if DIR is omitted)")
+    parser.add_argument("--replay-latency", type=float, default=0.0, help="Simulated seconds per request in replay mode")
+    parser.add_argument("--columnar", nargs='*', default=['parquet'], choices=list(COLUMNAR_FORMATS), help="Columnar outputs written next to the Excel file (none if given without values)")
+    parser.add_argument("--resume", action="store_true", help="Skip the tickers completed by an interrupted previous run")
+    parser.add_argument("--retries", type=int, default=2, help="Retries, with exponential backoff, of a failed request (per ticker, or per chunk of a batched download)")
+    parser.add_argument("--dead-ticker-ttl", type=float, default=168, help="Hours a ticker with no data, not found or invalid is skipped without a request (0 always retries)")
+    parser.add_argument("--risk-free", type=float, default=0.0, help="Annual risk-free rate in percent, used by the Sharpe ratio of the Risk sheet")
+    parser.add_argument("--price-mode", default='adjusted', choices=PRICE_MODES, help="Growth from Yahoo's adjusted close, the plain close, or a dividend-reinvested total-return index")
+    parser.add_argument("--currency", default='USD', type=currency_code, help="Currency the closes are converted to before computing growth ('local' keeps each listing's own currency)")
+    parser.add_argument("--granularity", nargs='*', default=[], choices=list(PERIOD_GRANULARITIES), help="Also write quarterly and/or monthly heatmaps from the same daily closes")
+    parser.add_argument("--rebalance", default='quarterly', choices=list(REBALANCE_FREQUENCIES), help="Rebalancing of the equal- and cap-weighted baskets of the watchlist report")
+    parser.add_argument("--refresh-constituents", action="store_true", help="Revalidate the cached constituent list even if it is not expired")
+
+
+def period_file_name(file_name, granularity):
+    """
+    Return the file name of a period heatmap, e.g. SP500_Annual_Growth.xlsx -> SP500_Monthly_Growth.xlsx.
+    """
+    return file_name.replace('Annual', granularity.capitalize())
+
+
+def index_constituents(source, refresh=False):
+    """
+    Return the constituents of an index, from the locally cached Wikipedia table.
+
+    Args:
+    - source (dict): ConstituentSource arguments, e.g. SP500_SOURCE.
+    - refresh (bool): Revalidate the cached list even if it is not expired.
+
+    Returns:
+    - tuple: (list of Yahoo tickers, dict ticker -> company name)
+    """
+    constituents = ConstituentSource(ttl_hours=0 if refresh else 24, **source).get()
+    # Yahoo symbols: share-class dots become dashes (BRK.B -> BRK-B), exchange suffixes are kept
+    resolved = SymbolResolver().resolve_many([ticker for ticker, _ in constituents])
+    ticker_to_name = {resolved[ticker]: name for ticker, name in constituents if ticker in resolved}
+    return list(ticker_to_name), ticker_to_name
+
+
+def watchlist_tickers(symbols):
+    """
+    Return the Yahoo symbols of a hardcoded list such as QUANTUM_TICKERS (malformed symbols are dropped).
+    """
+    return list(SymbolResolver().resolve_many(symbols).values())
+
+
+def read_close_panel(tickers, price_cache, price_mode='adjusted'):
+    """
+    Read the cached closes of the tickers as one wide panel, without any request.
+
+    Args:
+    - tickers (list of str): Ticker symbols.
+    - price_cache (PriceCache): Local store of daily bars.
+    - price_mode (str): 'adjusted' ('Adj Close'), 'price' ('Close') or 'total' (dividend-reinvested index).
+
+    Returns:
+    - pd.DataFrame: Dates x tickers closes.
+    """
+    if price_mode == 'adjusted':
+        return price_cache.close_panel(tickers)
+    if price_mode == 'price':
+        return price_cache.close_panel(tickers, 'Close')
+    # Dividends go through the same float32 panel as the closes: cents per share fit easily
+    return total_return_index(price_cache.close_panel(tickers, 'Close'), price_cache.close_panel(tickers, 'Dividends'))
+
+
+def load_close_panel(tickers, price_cache, fetch_engine, checkpoint, batch_size=100, price_mode='adjusted'):
+    """
+    Bring the cached bars of the tickers up to date and return their closes as one wide panel.
+
+    Full histories are never kept in memory: the panel is read back from the cache as one float32
+    column per ticker on a shared date index (see PriceCache.close_panel).
+
+    Args:
+    - tickers (list of str): Ticker symbols (each one is fetched once, even if listed twice).
+    - price_cache (PriceCache): Local store of daily bars.
+    - fetch_engine (FetchEngine): Thread pool of the per-ticker requests.
+    - checkpoint (RunCheckpoint): Progress of the run; completed tickers are skipped.
+    - batch_size (int): Tickers per batched download request (0 downloads them one by one).
+    - price_mode (str): Price series of the panel (see read_close_panel).
+
+    Returns:
+    - pd.DataFrame: Dates x tickers closes.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if batch_size > 0:
+        # Refresh the cache with one request per chunk of tickers
+        stored = lambda ticker: checkpoint.record('history', ticker)
+        failures = price_cache.update_many(checkpoint.pending('history', tickers), chunk_size=batch_size, on_stored=stored)
+        for ticker, reason in failures.items():
+            checkpoint.record('history', ticker, error=reason)
+            print(f"Download failed for {ticker}: {reason}")
+    else:
+        # One history request per ticker, spread over the worker threads (the cache throttles its own requests)
+        # Only the last cached date comes back: the closes are read once, below, one column per ticker
+        fetched = lambda ticker, last_date, error: checkpoint.record('history', ticker, error=error)
+        fetch_engine.run(price_cache.refresh, checkpoint.pending('history', tickers), throttled=False, name='refresh_history', on_result=fetched)
+        fetch_engine.report('refresh_history')
+
+    # Read all closes as one wide panel (tickers completed by an interrupted run included)
+    return read_close_panel(tickers, price_cache, price_mode)
+
+
+def to_base_currency(close_panel, base, price_cache, fetch_engine, checkpoint, batch_size=100):
+    """
+    Convert a close panel to the base currency, with the FX series cached like any other ticker.
+
+    Only one FX series per currency is brought up to date (e.g. TWDUSD=X for all the .TW listings),
+    then every column of that currency is converted at once.
+
+    Args:
+    - close_panel (pd.DataFrame): Dates x tickers closes in local currency.
+    - base (str): Currency code, or 'local' to keep the closes as they are.
+    - price_cache, fetch_engine, checkpoint, batch_size: As for load_close_panel.
+
+    Returns:
+    - tuple: (converted panel, dates x FX symbols closes, None if nothing had to be converted)
+    """
+    pairs = fx_pairs(close_panel.columns, base) if base != 'local' else {}
+    if not pairs:
+        return close_panel, None
+    fx_closes = load_close_panel(list(pairs.values()), price_cache, fetch_engine, checkpoint, batch_size)
+    print(f"Closes converted to {base} with {', '.join(pairs.values())}")
+    return convert_panel(close_panel, fx_closes, base), fx_closes
+
+
+def tickers_with_data(close_panel, tickers):
+    """
+    Return the tickers that have at least one close in the panel, reporting the others.
+    """
+    available = []
+    for ticker in tickers:
+        if ticker not in close_panel or close_panel[ticker].isna().all():
+            print(f"No historical data for {ticker}. Skipping.")
+        else:
+            available.append(ticker)
+    return available
+
+
+def fetch_market_caps(tickers, provider, fetch_engine, checkpoint):
+    """
+    Fetch the market caps from the live quote, concurrently (a failed lookup leaves the market cap empty).
+
+    Returns:
+    - dict: ticker -> market cap
+    """
+    def fetch_market_cap(ticker):
+        return provider.quote(ticker, ['market_cap'])['market_cap']
+
+    fetched = lambda ticker, market_cap, error: checkpoint.record('market_cap', ticker, market_cap, error)
+    fetch_engine.run(fetch_market_cap, checkpoint.pending('market_cap', tickers), on_result=fetched)
+    fetch_engine.report('fetch_market_cap')
+    return checkpoint.results('market_cap')
+
+
+def fetch_company_names(tickers, provider, fetch_engine, checkpoint):
+    """
+    Fetch the company names from the ticker metadata, concurrently ('N/A' if the lookup fails).
+
+    Returns:
+    - dict: ticker -> company name
+    """
+    def fetch_company_name(ticker):
+        info = provider.metadata(ticker)
+        return info.get('shortName') or info.get('longName') or 'N/A'
+
+    fetched = lambda ticker, name, error: checkpoint.record('name', ticker, name, error)
+    fetch_engine.run(fetch_company_name, checkpoint.pending('name', tickers), on_result=fetched)
+    fetch_engine.report('fetch_company_name')
+    names = checkpoint.results('name')
+    return {ticker: names.get(ticker) or 'N/A' for ticker in tickers}
+
+
+def format_market_cap(market_cap):
+    """
+    Format a market cap for readability (e.g. 2.1T, 350.4B).
+    """
+    if pd.isna(market_cap):
+        return ''
+    elif market_cap >= 1e12:
+        return f'{market_cap / 1e12:.1f}T'  # Trillions
+    elif market_cap >= 1e9:
+        return f'{market_cap / 1e9:.1f}B'   # Billions
+    elif market_cap >= 1e6:
+        return f'{market_cap / 1e6:.1f}M'   # Millions
+    else:
+        return str(market_cap)
+
+
+def save_report(file_name, df, columnar_df, data_col_start, columnar=('parquet',), column_widths=None, risk=None, profile=None):
+    """
+    Write the Excel heatmap and its columnar outputs, with the risk metrics of the tickers when given.
+    """
+    profile = profile or RunProfile()
+    extra_sheets = []
+    if risk is not None:
+        # Risk sheet in the row order of the heatmap; the same metrics become extra columnar columns
+        constituents = columnar_df[columnar_df['Ticker'] != '']
+        risk_table = constituents[['Ticker', 'Company Name']].join(risk, on='Ticker')
+        extra_sheets.append(('Risk', risk_table, {'Sharpe': 'report_ratio'}))
+        columnar_df = columnar_df.join(risk, on='Ticker')
+
+    # Rows are streamed to disk with their named styles; the heatmap bands are worksheet-level
+    # conditional formatting rules, so no cell is filled one by one
+    write_growth_report(file_name, df, data_col_start, column_widths=column_widths, extra_sheets=extra_sheets, profile=profile)
+    print(f"Data has been saved to {file_name}")
+
+    # Same numbers as the heatmap, as Parquet/Arrow/CSV with proper dtypes
+    with profile.stage('columnar_write'):
+        paths = write_columnar_report(os.path.splitext(file_name)[0], columnar_df, columnar)
+    for path in paths:
+        print(f"Data has been saved to {path}")
+
+
+def market_cap_table(growth, ticker_to_name, market_caps):
+    """
+    Assemble the table of an index report: yearly growth of the constituents, sorted by market cap.
+
+    Args:
+    - growth (pd.DataFrame): Tickers x years growth of the constituents, as returned by yearly_growth.
+    - ticker_to_name (dict): Ticker -> company name.
+    - market_caps (dict): Ticker -> market cap.
+
+    Returns:
+    - tuple: (table for Excel with formatted market caps, numeric table for the columnar outputs)
+    """
+    df = growth.copy()
+
+    # Add Market Cap column (numeric values)
+    df['Market Cap'] = df.index.map(market_caps)
+
+    # Create a temporary numeric column for sorting
+    df['Market Cap Numeric'] = df['Market Cap']
+
+    # Sort the DataFrame by Market Cap Numeric in descending order
+    df.sort_values(by='Market Cap Numeric', ascending=False, inplace=True)
+
+    # Format the Market Cap values for readability
+    df['Market Cap'] = df['Market Cap'].apply(format_market_cap)
+
+    # Drop the temporary numeric column
+    df.drop(columns=['Market Cap Numeric'], inplace=True)
+
+    # Round the DataFrame values to one decimal place (in case any values were missed)
+    df = df.round(1)
+
+    # Reset the index to turn the ticker symbol into a column
+    df.reset_index(inplace=True)
+
+    # Add the company name column
+    df['Company Name'] = df['Ticker'].map(ticker_to_name)
+
+    # Reorder columns to have Ticker, Company Name, Market Cap, then the years
+    cols = ['Ticker', 'Company Name', 'Market Cap'] + [col for col in df.columns if col not in ['Ticker', 'Company Name', 'Market Cap']]
+    df = df[cols]
+
+    # Numeric table for the columnar outputs: raw market caps instead of the formatted strings
+    columnar_df = df.assign(**{'Market Cap': df['Ticker'].map(market_caps)})
+
+    return df, columnar_df
+
+
+def write_market_cap_report(file_name, growth, ticker_to_name, market_caps, columnar=('parquet',), risk=None, profile=None):
+    """
+    Write an index report: yearly growth of the constituents, sorted by market cap.
+
+    Args:
+    - file_name (str): Path of the .xlsx file.
+    - growth (pd.DataFrame): Tickers x years (or periods) growth of the constituents, from yearly_growth or period_growth.
+    - ticker_to_name (dict): Ticker -> company name.
+    - market_caps (dict): Ticker -> market cap.
+    - columnar (list of str): Columnar formats written next to the Excel file.
+    - risk (pd.DataFrame): Ticker x metrics from risk_metrics, written to a Risk sheet and as extra columnar columns.
+    - profile (RunProfile): Run profile receiving the stage times.
+    """
+    profile = profile or RunProfile()
+    with profile.stage('assembly'):
+        df, columnar_df = market_cap_table(growth, ticker_to_name, market_caps)
+    data_col_start = 4  # First three columns are Ticker, Company Name, and Market Cap
+    save_report(file_name, df, columnar_df, data_col_start, columnar, risk=risk, profile=profile)
+
+
+def etf_baskets(close_panel, tickers, market_caps, years, rebalance='quarterly', granularity='yearly'):
+    """
+    Period returns of the equal- and cap-weighted baskets of a watchlist, simulated on the daily closes.
+
+    Both baskets are rebalanced at the same frequency; the cap weights come from the latest market caps
+    at constant share count. A basket without any ticker (e.g. no market cap known) is left out.
+
+    Args:
+    - close_panel (pd.DataFrame): Dates x tickers closes.
+    - tickers (list of str): Tickers of the watchlist.
+    - market_caps (dict): ticker -> market cap.
+    - years (list of int): Years to report.
+    - rebalance (str): Key of REBALANCE_FREQUENCIES.
+    - granularity (str): 'yearly', or a key of PERIOD_GRANULARITIES.
+
+    Returns:
+    - pd.DataFrame: Baskets x periods growth in percent.
+    """
+    tickers = [ticker for ticker in tickers if ticker in close_panel.columns]
+    weights = pd.DataFrame([
+        equal_weights(tickers),
+        cap_weights({ticker: market_caps.get(ticker) for ticker in tickers}),
+    ], index=[EQUAL_WEIGHT_BASKET, CAP_WEIGHT_BASKET])
+    nav = simulate_baskets(close_panel[tickers], weights, REBALANCE_FREQUENCIES[rebalance], cap_weighted=[CAP_WEIGHT_BASKET])
+    if granularity == 'yearly':
+        return yearly_growth(nav, years)
+    return period_growth(nav, granularity, years)
+
+
+def etf_table(growth, ticker_to_name, baskets=None):
+    """
+    Assemble the table of a watchlist report: yearly growth of the tickers, followed by their baskets.
+
+    Without baskets, the last row is the equally weighted mean of the yearly growths.
+
+    Args:
+    - growth (pd.DataFrame): Tickers x years growth, as returned by yearly_growth.
+    - ticker_to_name (dict): Ticker -> company name.
+    - baskets (pd.DataFrame): Baskets x years growth, as returned by etf_baskets.
+
+    Returns:
+    - tuple: (table for Excel with a blank row before the mean, numeric table for the columnar outputs)
+    """
+    df = growth.copy()
+
+    # Round the DataFrame values to one decimal place (in case any values were missed)
+    df = df.round(1)
+
+    # Reset the index to turn the ticker symbol into a column
+    df.reset_index(inplace=True)
+
+    # Add the company name column
+    df['Company Name'] = df['Ticker'].map(ticker_to_name)
+
+    # Reorder columns to have Ticker, Company Name, then the years
+    cols = ['Ticker', 'Company Name'] + [col for col in df.columns if col not in ['Ticker', 'Company Name']]
+    df = df[cols]
+
+    if baskets is not None:
+        # Simulated baskets, named in the 'Company Name' column
+        avg_growth = baskets.reindex(columns=growth.columns).round(1).reset_index(drop=True)
+        avg_growth.insert(0, 'Company Name', list(baskets.index))
+        avg_growth.insert(0, 'Ticker', '')
+    else:
+        # Calculate the average annual growth rate, treating the companies as an equally weighted ETF
+        # Exclude companies without data in a given year
+        avg_growth = df.set_index(['Ticker', 'Company Name']).mean(axis=0, skipna=True).round(1)
+        avg_growth = avg_growth.to_frame().T
+        avg_growth.insert(0, 'Company Name', 'Weighted Mean (ETF)')
+        avg_growth.insert(0, 'Ticker', '')
+
+    # Numeric table (constituents and average row) for the columnar outputs
+    columnar_df = pd.concat([df, avg_growth], ignore_index=True)
+
+    # Append a blank row and then the average growth row to the DataFrame
+    blank_row = pd.DataFrame([['' for _ in df.columns]], columns=df.columns)
+    df = pd.concat([df, blank_row, avg_growth], ignore_index=True)
+
+    return df, columnar_df
+
+
+def write_etf_report(file_name, growth, ticker_to_name, columnar=('parquet',), baskets=None, risk=None, profile=None):
+    """
+    Write a watchlist report: yearly growth of the tickers, followed by their baskets.
+
+    Args:
+    - file_name (str): Path of the .xlsx file.
+    - growth (pd.DataFrame): Tickers x years (or periods) growth, from yearly_growth or period_growth.
+    - ticker_to_name (dict): Ticker -> company name.
+    - baskets (pd.DataFrame): Baskets x years (or periods) growth, as returned by etf_baskets (default is the mean row).
+    - columnar (list of str): Columnar formats written next to the Excel file.
+    - risk (pd.DataFrame): Ticker x metrics from risk_metrics, written to a Risk sheet and as extra columnar columns.
+    - profile (RunProfile): Run profile receiving the stage times.
+    """
+    profile = profile or RunProfile()
+    with profile.stage('assembly'):
+        df, columnar_df = etf_table(growth, ticker_to_name, baskets)
+    data_col_start = 3  # Data starts from the third column
+    column_widths = {get_column_letter(2): 30}  # Wider 'Company Name' column (B)
+    save_report(file_name, df, columnar_df, data_col_start, columnar, column_widths, risk=risk, profile=profile)
@@ -0,0 +1,327 @@
+import os
+import re
+import json
+import time
+import zlib
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+try:
+    # yfinance keeps the per-ticker error messages of the last download in this module
+    from yfinance import shared as yf_shared
+except ImportError:
+    yf_shared = None
+
+# Columns of a history frame, as returned by Ticker.history(auto_adjust=False)
+HISTORY_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume', 'Dividends', 'Stock Splits']
+
+# Failure message of a ticker for which the provider returned no bars, without any error
+NO_DATA = 'No data returned'
+
+
+class MarketDataProvider:
+    """
+    Source of market data used by the finance scripts: price history, live quotes and company metadata.
+
+    History frames always have the HISTORY_COLUMNS (unadjusted Close, Yahoo's 'Adj Close', and the
+    corporate actions), indexed by date.
+    """
+    name = 'base'
+
+    def history(self, ticker, period=None, start=None, end=None):
+        """
+        Return the daily bars of a ticker.
+
+        Args:
+        - ticker (str): Ticker symbol.
+        - period (str): Period such as '5d', '1y' or 'max' (default is 'max' when start is not given).
+        - start (str): First date to return (YYYY-MM-DD).
+        - end (str): Date after the last one to return (YYYY-MM-DD).
+
+        Returns:
+        - pd.DataFrame: Daily bars (empty if there is no data for the ticker).
+        """
+        raise NotImplementedError
+
+    def download(self, tickers, **kwargs):
+        """
+        Return the daily bars of several tickers. Providers with a batched endpoint override this.
+
+        Args:
+        - tickers (list of str): Ticker symbols.
+        - **kwargs: Same arguments as history().
+
+        Returns:
+        - tuple: (dict ticker -> DataFrame of bars, dict ticker -> failure reason)
+        """
+        frames = {}
+        failures = {}
+        for ticker in tickers:
+            try:
+                hist = self.history(ticker, **kwargs)
+            except Exception as e:
+                failures[ticker] = str(e)
+                continue
+            if hist.empty:
+                failures[ticker] = NO_DATA
+            else:
+                frames[ticker] = hist
+        return frames, failures
+
+    def quote(self, ticker, fields=('last_price',)):
+        """
+        Return live quote fields of a ticker (names as in yfinance's fast_info, e.g. 'last_price', 'market_cap').
+
+        Args:
+        - ticker (str): Ticker symbol.
+        - fields (list of str): Fields to return; only these are requested.
+
+        Returns:
+        - dict: field -> value
+        """
+        raise NotImplementedError
+
+    def metadata(self, ticker):
+        """
+        Return the descriptive data of a ticker (keys as in yfinance's Ticker.info, e.g. 'shortName', 'industry').
+        """
+        raise NotImplementedError
+
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Market data from Yahoo Finance through yfinance.
+    """
+    name = 'yfinance'
+
+    def history(self, ticker, period=None, start=None, end=None):
+        kwargs = {key: value for key, value in (('start', start), ('end', end)) if value is not None}
+        kwargs['period'] = period or ('max' if start is None else None)
+        if kwargs['period'] is None:
+            del kwargs['period']
+        return yf.Ticker(ticker).history(auto_adjust=False, **kwargs)
+
+    def download(self, tickers, **kwargs):
+        """
+        Download several tickers with a single yf.download request.
+        """
+        tickers = list(tickers)
+        if kwargs.get('period') is None and kwargs.get('start') is None:
+            kwargs['period'] = 'max'
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
+        raw = yf.download(tickers, group_by='ticker', auto_adjust=False, actions=True, progress=False, **kwargs)
+        errors = getattr(yf_shared, '_ERRORS', None) or {}
+        frames = {}
+        failures = {}
+        for ticker in tickers:
+            if raw is None or raw.empty:
+                hist = None
+            elif isinstance(raw.columns, pd.MultiIndex):
+                hist = raw[ticker] if ticker in raw.columns.get_level_values(0) else None
+            else:
+                hist = raw  # Older yfinance versions return flat columns for a single ticker
+            if hist is not None and 'Close' in hist:
+                hist = hist.dropna(subset=['Close'])
+            if hist is None or hist.empty:
+                failures[ticker] = errors.get(ticker, NO_DATA)
+                continue
+            frames[ticker] = hist
+        return frames, failures
+
+    def quote(self, ticker, fields=('last_price',)):
+        yf_ticker = yf.Ticker(ticker)
+        values = {}
+        if 'last_price' in fields:
+            # fast_info's last_price downloads a year of daily bars; the last close of a one-day history is a single row
+            hist = yf_ticker.history(period='1d', auto_adjust=False)
+            values['last_price'] = float(hist['Close'].iloc[-1]) if not hist.empty else None
+        other_fields = [field for field in fields if field not in values]
+        if other_fields:
+            fast_info = yf_ticker.fast_info
+            values.update({field: fast_info[field] for field in other_fields})
+        return {field: values[field] for field in fields}
+
+    def metadata(self, ticker):
+        return yf.Ticker(ticker).info
+
+
+def synthetic_history(ticker, start='1990-01-01', end=None, seed=None):
+    """
+    Generate a deterministic random-walk history for a ticker, with quarterly dividends for some tickers.
+
+    Args:
+    - ticker (str): Ticker symbol (also the default random seed).
+    - start (str): First date of the series.
+    - end (str): Last date of the series (default is today).
+    - seed (int): Random seed (default is derived from the ticker).
+
+    Returns:
+    - pd.DataFrame: Daily bars with the HISTORY_COLUMNS.
+    """
+    rng = np.random.default_rng(zlib.crc32(ticker.encode()) if seed is None else seed)
+    # Tickers list at different dates, like a real universe
+    first = pd.Timestamp(start) + pd.Timedelta(days=int(rng.integers(0, 365 * 20)))
+    dates = pd.bdate_range(first, end or pd.Timestamp.today().normalize())
+    if len(dates) == 0:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    returns = rng.normal(rng.uniform(-0.0002, 0.0008), rng.uniform(0.01, 0.03), len(dates))
+    close = rng.uniform(5, 200) * np.exp(np.cumsum(returns))
+
+    dividends = np.zeros(len(dates))
+    if rng.random() < 0.5:
+        dividends[63::63] = close[63::63] * rng.uniform(0.002, 0.01)
+    # Yahoo's adjustment: every close before an ex-date is scaled by (1 - dividend / previous close)
+    factors = np.ones(len(dates))
+    ex_dates = np.nonzero(dividends)[0]
+    factors[ex_dates - 1] = 1 - dividends[ex_dates] / close[ex_dates - 1]
+    adjustment = np.cumprod(factors[::-1])[::-1]
+
+    spread = np.abs(rng.normal(0, 0.01, len(dates)))
+    hist = pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.005, len(dates))),
+        'High': close * (1 + spread),
+        'Low': close * (1 - spread),
+        'Close': close,
+        'Adj Close': close * adjustment,
+        'Volume': rng.integers(1e5, 1e7, len(dates)).astype(float),
+        'Dividends': dividends,
+        'Stock Splits': 0.0,
+    }, index=dates)
+    hist.index.name = 'Date'
+    return hist
+
+
+class ReplayProvider(MarketDataProvider):
+    """
+    Offline market data, for benchmarks and load tests without network access.
+
+    Histories are read from <data_dir>/<ticker>.csv and metadata from <data_dir>/metadata.json, as
+    written by record(). Tickers without a recording get a synthetic history (see synthetic_history).
+    Every call sleeps for `latency` seconds to mimic a network round trip.
+    """
+    name = 'replay'
+
+    def __init__(self, data_dir=None, latency=0.0, synthetic=True):
+        """
+        Args:
+        - data_dir (str): Folder with recorded data (None for synthetic data only).
+        - latency (float): Seconds to wait on every call.
+        - synthetic (bool): Generate data for tickers that have no recording (otherwise they have no data).
+        """
+        self.data_dir = data_dir
+        self.latency = latency
+        self.synthetic = synthetic
+        self._histories = {}
+        self._metadata = {}
+        if data_dir and os.path.exists(os.path.join(data_dir, 'metadata.json')):
+            with open(os.path.join(data_dir, 'metadata.json'), 'r') as file:
+                self._metadata = json.load(file)
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _full_history(self, ticker):
+        path = os.path.join(self.data_dir, f"{ticker}.csv") if self.data_dir else None
+        if path and os.path.exists(path):
+            if ticker not in self._histories:
+                hist = pd.read_csv(path, index_col=0, parse_dates=True)
+                self._histories[ticker] = hist.reindex(columns=HISTORY_COLUMNS).fillna({'Dividends': 0.0, 'Stock Splits': 0.0})
+            return self._histories[ticker]
+        # Synthetic histories are regenerated on every call instead of being kept,
+        # so replaying a universe of thousands of tickers does not hold all of them in memory
+        if self.synthetic:
+            return synthetic_history(ticker)
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    def history(self, ticker, period=None, start=None, end=None):
+        self._wait()
+        hist = self._full_history(ticker)
+        if hist.empty:
+            return hist
+        if start is not None:
+            hist = hist[hist.index >= pd.Timestamp(start)]
+        if end is not None:
+            hist = hist[hist.index < pd.Timestamp(end)]
+        if period and period != 'max':
+            match = re.fullmatch(r'(\d+)(d|wk|mo|y)', period)
+            if not match:
+                raise ValueError(f"Unsupported period: {period}")
+            count, unit = int(match.group(1)), match.group(2)
+            if unit == 'd':
+                hist = hist.tail(count)  # Trading days, as Yahoo does
+            else:
+                offset = {'wk': pd.DateOffset(weeks=count), 'mo': pd.DateOffset(months=count), 'y': pd.DateOffset(years=count)}[unit]
+                hist = hist[hist.index > hist.index[-1] - offset]
+        return hist
+
+    def quote(self, ticker, fields=('last_price',)):
+        self._wait()
+        # Only the price fields need the history
+        needs_history = 'last_price' in fields or 'previous_close' in fields
+        hist = self._full_history(ticker) if needs_history else pd.DataFrame(columns=HISTORY_COLUMNS)
+        metadata = self._metadata.get(ticker) or self._synthetic_metadata(ticker)
+        last_price = hist['Close'].iloc[-1] if not hist.empty else None
+        values = {
+            'last_price': last_price,
+            'previous_close': hist['Close'].iloc[-2] if len(hist) > 1 else None,
+            'market_cap': metadata.get('marketCap'),
+            'currency': metadata.get('currency'),
+            'timezone': metadata.get('exchangeTimezoneName'),
+        }
+        return {field: values.get(field) for field in fields}
+
+    def metadata(self, ticker):
+        self._wait()
+        return dict(self._metadata.get(ticker) or self._synthetic_metadata(ticker))
+
+    def _synthetic_metadata(self, ticker):
+        if not self.synthetic:
+            return {}
+        rng = np.random.default_rng(zlib.crc32(ticker.encode()))
+        return {
+            'shortName': f"{ticker} Synthetic Corp",
+            'currency': 'USD',
+            'exchangeTimezoneName': 'America/New_York',
+            'marketCap': float(rng.uniform(1e9, 3e12)),
+            'trailingPE': float(rng.uniform(5, 60)),
+            'trailingEps': float(rng.uniform(-2, 20)),
+            'industry': 'Synthetic',
+        }
+
+    @staticmethod
+    def record(source, tickers, data_dir):
+        """
+        Save the history and metadata of some tickers from another provider, for later replay.
+
+        Args:
+        - source (MarketDataProvider): Provider to record from (e.g. YFinanceProvider()).
+        - tickers (list of str): Ticker symbols.
+        - data_dir (str): Destination folder.
+        """
+        os.makedirs(data_dir, exist_ok=True)
+        metadata = {}
+        for ticker in tickers:
+            print(f"Recording {ticker}...")
+            hist = source.history(ticker, period='max')
+            if hist.empty:
+                continue
+            hist.index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+            hist.reindex(columns=HISTORY_COLUMNS).to_csv(os.path.join(data_dir, f"{ticker}.csv"))
+            metadata[ticker] = {key: value for key, value in source.metadata(ticker).items() if isinstance(value, (str, int, float))}
+        with open(os.path.join(data_dir, 'metadata.json'), 'w') as file:
+            json.dump(metadata, file, indent=2)
+
+
+def get_provider(replay_dir=None, latency=0.0):
+    """
+    Return the provider selected on the command line: Yahoo Finance, or a replay provider when replay_dir is given.
+
+    Args:
+    - replay_dir (str): Folder of recorded data; '' replays synthetic data only, None uses Yahoo Finance.
+    - latency (float): Simulated latency of the replay provider, in seconds.
+    """
+    if replay_dir is None:
+        return YFinanceProvider()
+    return ReplayProvider(data_dir=replay_dir or None, latency=latency)
@@ -0,0 +1,133 @@
+import os
+import re
+import json
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Matrices saved for every panel: the closes, and the daily returns computed from them
+PANEL_KINDS = ('closes', 'returns')
+
+
+def default_store_dir():
+    return os.path.join(os.path.expanduser('~/.finance_cache'), 'panels')
+
+
+def _write_matrix(path, shape, fill, chunk_size):
+    """
+    Write a float32 .npy file column chunk by column chunk, then move it in place.
+    """
+    temp_path = path + '.tmp.npy'
+    matrix = np.lib.format.open_memmap(temp_path, mode='w+', dtype='float32', shape=shape)
+    for start in range(0, shape[1], chunk_size):
+        stop = min(start + chunk_size, shape[1])
+        matrix[:, start:stop] = fill(start, stop)
+    matrix.flush()
+    del matrix
+    os.replace(temp_path, path)
+
+
+def _remove_old_generations(store_dir, name, keep):
+    """
+    Delete the matrices of the previous generations of a panel, best effort: on Windows a file that
+    another process still has memory-mapped cannot be deleted, it is left for a later run.
+    """
+    # Generations are '<name>.<generation>-<kind>.npy'; '<name>.<kind>.npy' is the unversioned layout of older runs
+    pattern = re.compile(rf"^{re.escape(name)}\.(\d+-)?({'|'.join(PANEL_KINDS)})\.npy$")
+    for file_name in os.listdir(store_dir):
+        if pattern.match(file_name) and file_name not in keep:
+            try:
+                os.remove(os.path.join(store_dir, file_name))
+            except OSError:
+                pass
+
+
+def save_panel(name, close_panel, store_dir=None, chunk_size=500):
+    """
+    Persist a close panel as memory-mapped float32 matrices (closes and daily returns) plus a JSON sidecar.
+
+    Other processes open them with open_panel, zero-copy, instead of loading and pickling their own DataFrame.
+    A return is the change from the previous available close of the ticker, so gaps (holidays of
+    another exchange) do not break the series; it is NaN where the ticker has no close.
+
+    Every save writes a new generation of matrix files, named in the sidecar, so a reader that keeps
+    a previous generation open is never overwritten; previous generations are deleted once unused.
+
+    Args:
+    - name (str): Name of the panel (e.g. 'sp500').
+    - close_panel (pd.DataFrame): Dates x tickers closes, as returned by PriceCache.close_panel.
+    - store_dir (str): Folder of the panel files (default is ~/.finance_cache/panels).
+    - chunk_size (int): Tickers written at a time, to bound the memory used for the returns.
+
+    Returns:
+    - str: Path of the sidecar file (None if it could not be replaced, e.g. locked by a reader).
+    """
+    store_dir = store_dir or default_store_dir()
+    os.makedirs(store_dir, exist_ok=True)
+    closes = close_panel.to_numpy(dtype='float32')
+    shape = closes.shape
+    generation = datetime.now().strftime('%Y%m%d%H%M%S%f')
+    files = {kind: f"{name}.{generation}-{kind}.npy" for kind in PANEL_KINDS}
+
+    def returns(start, stop):
+        chunk = pd.DataFrame(closes[:, start:stop])
+        return (chunk / chunk.ffill().shift(1) - 1).to_numpy(dtype='float32')
+
+    _write_matrix(os.path.join(store_dir, files['closes']), shape, lambda start, stop: closes[:, start:stop], chunk_size)
+    _write_matrix(os.path.join(store_dir, files['returns']), shape, returns, chunk_size)
+
+    # The sidecar is written last and names the matrices of its generation, so readers never see
+    # labels that do not match the data
+    sidecar = {
+        'generation': generation,
+        'files': files,
+        'tickers': [str(ticker) for ticker in close_panel.columns],
+        'dates': close_panel.index.strftime('%Y-%m-%d').tolist(),
+        'dtype': 'float32',
+        'created_at': datetime.now().isoformat(),
+    }
+    sidecar_path = os.path.join(store_dir, f"{name}.json")
+    with open(sidecar_path + '.tmp', 'w') as file:
+        json.dump(sidecar, file)
+    try:
+        os.replace(sidecar_path + '.tmp', sidecar_path)
+    except OSError as e:
+        # A reader holding the sidecar open (Windows) must not stop the run: the reports come next
+        print(f"Could not update the {name} panel ({e}); readers keep the previous one.")
+        _remove_old_generations(store_dir, name, keep=set(files.values()))
+        return None
+    _remove_old_generations(store_dir, name, keep=set(files.values()))
+    return sidecar_path
+
+
+def open_panel(name, kind='closes', store_dir=None):
+    """
+    Open a saved panel as a read-only, memory-mapped DataFrame (no data is read until it is used).
+
+    Args:
+    - name (str): Name of the panel (e.g. 'sp500').
+    - kind (str): 'closes' or 'returns'.
+    - store_dir (str): Folder of the panel files (default is ~/.finance_cache/panels).
+
+    Returns:
+    - pd.DataFrame: Dates x tickers float32 values backed by the .npy file.
+    """
+    if kind not in PANEL_KINDS:
+        raise ValueError(f"Unknown panel kind: {kind} (expected one of {', '.join(PANEL_KINDS)})")
+    store_dir = store_dir or default_store_dir()
+    for attempt in range(2):
+        with open(os.path.join(store_dir, f"{name}.json"), 'r') as file:
+            sidecar = json.load(file)
+        if 'files' not in sidecar:
+            raise ValueError(f"Panel {name} was saved by an older version, run the analyzer again")
+        try:
+            values = np.load(os.path.join(store_dir, sidecar['files'][kind]), mmap_mode='r')
+            break
+        except FileNotFoundError:
+            # A new generation was saved between reading the sidecar and opening its matrix
+            if attempt:
+                raise
+    if values.shape != (len(sidecar['dates']), len(sidecar['tickers'])):
+        raise ValueError(f"Panel {name} generation {sidecar['generation']} does not match its sidecar")
+    index = pd.DatetimeIndex(pd.to_datetime(sidecar['dates'], format='%Y-%m-%d'), name='Date')
+    return pd.DataFrame(values, index=index, columns=pd.Index(sidecar['tickers'], name='ticker'), copy=False)
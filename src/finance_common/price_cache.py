@@ -0,0 +1,354 @@
+import os
+import time
+import sqlite3
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from batch_fetch import chunked, download_batched
+from market_data import YFinanceProvider, NO_DATA
+
+# Columns returned by MarketDataProvider.history, mapped to the SQLite column names
+PRICE_COLUMNS = {
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Close': 'close',
+    'Adj Close': 'adj_close',
+    'Volume': 'volume',
+    'Dividends': 'dividends',
+    'Stock Splits': 'splits',
+}
+
+# Reason codes of the negative cache, matched against the provider's error message (first match wins).
+# Other errors (timeouts, throttling) are transient and never cached.
+FAILURE_REASONS = [
+    ('bad_symbol', ('invalid', 'no timezone found', 'symbol may be')),
+    ('not_found', ('404', 'not found')),
+    ('empty', ('no data', 'no price data', 'delisted')),
+]
+
+
+def failure_reason(message):
+    """
+    Return the negative-cache reason code of a download error ('empty', 'not_found' or 'bad_symbol'), or None if it is transient.
+    """
+    message = message.lower()
+    for reason, patterns in FAILURE_REASONS:
+        if any(pattern in message for pattern in patterns):
+            return reason
+    return None
+
+
+class PriceCache:
+    def __init__(self, cache_dir=None, db_filename=None, max_age_hours=12, limiter=None, provider=None, negative_ttl_hours=168,
+                 retries=0, backoff=1.0):
+        """
+        Persistent store of daily OHLCV bars, kept in a single SQLite file.
+
+        The first request for a ticker downloads its whole history; later requests only
+        download the bars after the last cached date. Tickers that came back empty, not found or
+        invalid are remembered for negative_ttl_hours and skipped without a request.
+
+        Args:
+        - cache_dir (str): Directory holding the database (default is ~/.finance_cache).
+        - db_filename (str): Name of the SQLite file inside cache_dir (default is prices.sqlite, or prices_<provider>.sqlite for other providers than Yahoo).
+        - max_age_hours (float): A ticker refreshed less than this many hours ago is served from disk without any request.
+        - limiter (TokenBucket): Rate limiter acquired before every download (None for no limit).
+        - provider (MarketDataProvider): Data source (default is Yahoo Finance).
+        - negative_ttl_hours (float): How long a failed ticker is skipped (0 disables the negative cache).
+        - retries (int): Extra requests, with exponential backoff, for the tickers of a batched download that failed transiently.
+        - backoff (float): Wait before the first retry, in seconds; doubled at every further retry.
+        """
+        self.cache_dir = cache_dir or os.path.expanduser('~/.finance_cache')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.max_age = timedelta(hours=max_age_hours)
+        self.negative_ttl = timedelta(hours=negative_ttl_hours or 0)
+        self.timings = {}  # batched request name -> {first ticker of the chunk: seconds}
+        self.limiter = limiter
+        self.retries = retries
+        self.backoff = backoff
+        self.provider = provider or YFinanceProvider()
+        # Replayed data never mixes with the real cache
+        if db_filename is None:
+            db_filename = 'prices.sqlite' if self.provider.name == 'yfinance' else f"prices_{self.provider.name}.sqlite"
+        self.db_path = os.path.join(self.cache_dir, db_filename)
+        self._create_tables()
+
+    def _connect(self):
+        # One short-lived connection per operation, so the cache can be shared between threads
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def _create_tables(self):
+        columns = ', '.join(f"{name} REAL" for name in PRICE_COLUMNS.values())
+        with self._connect() as conn:
+            conn.execute(f"CREATE TABLE IF NOT EXISTS prices (ticker TEXT, date TEXT, {columns}, PRIMARY KEY (ticker, date))")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (ticker TEXT PRIMARY KEY, last_date TEXT, updated_at TEXT)")
+            conn.execute("CREATE TABLE IF NOT EXISTS failures (ticker TEXT PRIMARY KEY, reason TEXT, message TEXT, failed_at TEXT)")
+
+    def last_date(self, ticker):
+        """
+        Return the last cached trading date for a ticker, or None if nothing is cached.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT last_date FROM meta WHERE ticker = ?", (ticker,)).fetchone()
+        return pd.Timestamp(row[0]) if row else None
+
+    def is_fresh(self, ticker):
+        """
+        Return True if the ticker was refreshed less than max_age ago.
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT updated_at FROM meta WHERE ticker = ?", (ticker,)).fetchone()
+        return bool(row) and datetime.now() - datetime.fromisoformat(row[0]) < self.max_age
+
+    def record_failure(self, ticker, message):
+        """
+        Remember a failed download in the negative cache, unless the error is transient.
+
+        Args:
+        - ticker (str): Ticker symbol.
+        - message (str): Error message of the provider.
+
+        Returns:
+        - str: Reason code of the cached failure, or None if it was not cached.
+        """
+        reason = failure_reason(message)
+        if reason is None or not self.negative_ttl:
+            return None
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO failures VALUES (?, ?, ?, ?)", (ticker, reason, message, datetime.now().isoformat())
+            )
+        return reason
+
+    def known_failures(self, tickers):
+        """
+        Return the tickers whose failure is still in the negative cache.
+
+        Returns:
+        - dict: ticker -> reason code
+        """
+        if not self.negative_ttl:
+            return {}
+        tickers = set(tickers)
+        oldest = (datetime.now() - self.negative_ttl).isoformat()
+        with self._connect() as conn:
+            rows = conn.execute("SELECT ticker, reason FROM failures WHERE failed_at >= ?", (oldest,)).fetchall()
+        return {ticker: reason for ticker, reason in rows if ticker in tickers}
+
+    def load(self, ticker):
+        """
+        Read the cached bars of a ticker.
+
+        Returns:
+        - pd.DataFrame: Bars indexed by date, with the same column names as Ticker.history (empty if nothing is cached).
+        """
+        with self._connect() as conn:
+            hist = pd.read_sql_query(
+                "SELECT * FROM prices WHERE ticker = ? ORDER BY date", conn, params=(ticker,), parse_dates=['date']
+            )
+        hist = hist.drop(columns='ticker').set_index('date')
+        hist.index.name = 'Date'
+        return hist.rename(columns={v: k for k, v in PRICE_COLUMNS.items()})
+
+    def store(self, ticker, hist, replace=False):
+        """
+        Write bars for a ticker, overwriting the rows with the same dates.
+
+        Args:
+        - ticker (str): Ticker symbol.
+        - hist (pd.DataFrame): Bars as returned by MarketDataProvider.history.
+        - replace (bool): Drop everything cached for the ticker before writing.
+        """
+        hist = hist.reindex(columns=list(PRICE_COLUMNS)).fillna({'Dividends': 0.0, 'Stock Splits': 0.0})
+        dates = hist.index.strftime('%Y-%m-%d')
+        rows = [(ticker, date, *values) for date, values in zip(dates, hist.itertuples(index=False, name=None))]
+        placeholders = ', '.join('?' * (len(PRICE_COLUMNS) + 2))
+        with self._connect() as conn:
+            if replace:
+                conn.execute("DELETE FROM prices WHERE ticker = ?", (ticker,))
+            conn.executemany(f"INSERT OR REPLACE INTO prices VALUES ({placeholders})", rows)
+            last_date = conn.execute("SELECT MAX(date) FROM prices WHERE ticker = ?", (ticker,)).fetchone()[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?, ?)", (ticker, last_date, datetime.now().isoformat())
+            )
+            conn.execute("DELETE FROM failures WHERE ticker = ?", (ticker,))
+
+    def get_history(self, ticker):
+        """
+        Return the full daily history of a ticker, downloading only what is missing from the cache (see refresh).
+
+        Args:
+        - ticker (str): Ticker symbol.
+
+        Returns:
+        - pd.DataFrame: Daily bars (empty if Yahoo has no data for the ticker).
+        """
+        if self.refresh(ticker) is None:
+            return pd.DataFrame(columns=list(PRICE_COLUMNS))
+        return self.load(ticker)
+
+    def refresh(self, ticker):
+        """
+        Bring the cached bars of a ticker up to date, without reading them back.
+
+        If the new bars carry a dividend or a split, Yahoo re-adjusts the whole series, so the
+        history is downloaded again from scratch instead of being appended. A ticker in the
+        negative cache is not requested.
+
+        Args:
+        - ticker (str): Ticker symbol.
+
+        Returns:
+        - pd.Timestamp: Last cached date (None if Yahoo has no data for the ticker).
+        """
+        last_date = self.last_date(ticker)
+        if last_date is not None and self.is_fresh(ticker):
+            return last_date
+
+        if last_date is None:
+            if self.known_failures([ticker]):
+                return None
+            self._throttle()
+            try:
+                hist = self.provider.history(ticker, period="max")
+            except Exception as e:
+                self.record_failure(ticker, str(e))
+                raise
+            if hist.empty:
+                self.record_failure(ticker, NO_DATA)
+                return None
+            self.store(ticker, hist, replace=True)
+            return self.last_date(ticker)
+
+        self._throttle()
+        # Re-download the last cached bar too, since it may have been stored while the session was still open
+        tail = self.provider.history(ticker, start=last_date.strftime('%Y-%m-%d'))
+        if not self._merge_tail(ticker, tail, last_date):
+            self._throttle()
+            self.store(ticker, self.provider.history(ticker, period="max"), replace=True)
+        return self.last_date(ticker)
+
+    def _throttle(self):
+        if self.limiter:
+            self.limiter.acquire()
+
+    def _merge_tail(self, ticker, tail, last_date):
+        """
+        Append freshly downloaded bars to the cached history of a ticker.
+
+        Returns:
+        - bool: False if the new bars carry a dividend or split, i.e. the whole history must be downloaded again.
+        """
+        new_bars = tail[tail.index.tz_localize(None).normalize() > last_date] if not tail.empty else tail
+        if not new_bars.empty and ((new_bars['Dividends'] != 0).any() or (new_bars['Stock Splits'] != 0).any()):
+            return False
+        self.store(ticker, tail)  # With no new bars this only refreshes the timestamp
+        return True
+
+    def _download(self, chunk, chunk_size, **kwargs):
+        # Batched request, retried for the tickers whose failure would not end up in the negative cache
+        return download_batched(chunk, chunk_size, limiter=self.limiter, provider=self.provider, retries=self.retries,
+                                backoff=self.backoff, transient=lambda reason: failure_reason(reason) is None, **kwargs)
+
+    def update_many(self, tickers, chunk_size=100, on_stored=None):
+        """
+        Bring many tickers up to date using one batched download per chunk of tickers.
+
+        Tickers in the negative cache are not requested and are returned as failures. A cached ticker
+        whose tail request came back empty is up to date; one whose request failed (timeout, throttling)
+        keeps its timestamp, so it is requested again, and is returned as a failure.
+
+        Args:
+        - tickers (list of str): Ticker symbols.
+        - chunk_size (int): Number of tickers per request.
+        - on_stored (callable): Called as on_stored(ticker) once a ticker is up to date in the cache (e.g. to checkpoint it).
+
+        Returns:
+        - dict: Failure reason for each ticker that could not be downloaded.
+        """
+        with self._connect() as conn:
+            meta = {ticker: (last_date, updated_at) for ticker, last_date, updated_at in conn.execute("SELECT * FROM meta")}
+        now = datetime.now()
+        stale = [t for t in tickers if t not in meta or now - datetime.fromisoformat(meta[t][1]) >= self.max_age]
+        dead = self.known_failures(t for t in stale if t not in meta)
+        new_tickers = [t for t in stale if t not in meta and t not in dead]
+        cached_tickers = [t for t in stale if t in meta]
+
+        on_stored = on_stored or (lambda ticker: None)
+        for ticker in tickers:
+            if ticker not in stale:
+                on_stored(ticker)
+
+        failures = {ticker: f"Skipped, known {reason} symbol (negative cache)" for ticker, reason in dead.items()}
+        refetch = list(new_tickers)
+        for chunk in chunked(cached_tickers, chunk_size):
+            # One request per chunk, starting from the oldest last cached date in it
+            last_dates = {t: pd.Timestamp(meta[t][0]) for t in chunk}
+            start = min(last_dates.values()).strftime('%Y-%m-%d')
+            request_start = time.perf_counter()
+            frames, chunk_failures = self._download(chunk, chunk_size, start=start)
+            self.timings.setdefault('download_tail_chunk', {})[chunk[0]] = time.perf_counter() - request_start
+            for ticker, tail in frames.items():
+                if self._merge_tail(ticker, tail, last_dates[ticker]):
+                    on_stored(ticker)
+                else:
+                    refetch.append(ticker)
+            for ticker, reason in chunk_failures.items():
+                if reason == NO_DATA:
+                    # Nothing new since the last run (weekend, holiday) is not a failure
+                    self.store(ticker, pd.DataFrame(index=pd.DatetimeIndex([])))
+                    on_stored(ticker)
+                else:
+                    # Timeouts, throttling, dropped connections: the cached bars are stale, try again next run
+                    failures[ticker] = reason
+
+        # Full histories are stored chunk by chunk, so an interrupted run keeps what it downloaded
+        for chunk in chunked(refetch, chunk_size):
+            request_start = time.perf_counter()
+            frames, chunk_failures = self._download(chunk, chunk_size, period="max")
+            self.timings.setdefault('download_full_chunk', {})[chunk[0]] = time.perf_counter() - request_start
+            for ticker, hist in frames.items():
+                self.store(ticker, hist, replace=True)
+                on_stored(ticker)
+            for ticker, reason in chunk_failures.items():
+                self.record_failure(ticker, reason)
+            failures.update(chunk_failures)
+        return failures
+
+    def close_panel(self, tickers, column='Adj Close', dtype='float32'):
+        """
+        Read one price column of many cached tickers as a single wide panel.
+
+        The panel is preallocated on one shared date index and filled ticker by ticker, so only one
+        column per ticker is ever held in memory. Values are float32 by default (about 7 significant
+        digits, plenty for growth figures): a 5,000-ticker x 35-year daily panel takes about 180 MB.
+
+        Args:
+        - tickers (list of str): Ticker symbols.
+        - column (str): Bar column to read (default is 'Adj Close').
+        - dtype (str): dtype of the panel values ('float64' for full precision).
+
+        Returns:
+        - pd.DataFrame: Dates x tickers, NaN where a ticker has no bar (tickers without cached data are left out).
+        """
+        db_column = PRICE_COLUMNS[column]
+        tickers = list(dict.fromkeys(tickers))
+        with self._connect() as conn:
+            # Shared date index and the tickers that have data, read from the primary key only
+            dates = set()
+            present = set()
+            for chunk in chunked(tickers, 500):
+                placeholders = ', '.join('?' * len(chunk))
+                present.update(row[0] for row in conn.execute(f"SELECT DISTINCT ticker FROM prices WHERE ticker IN ({placeholders})", chunk))
+                dates.update(row[0] for row in conn.execute(f"SELECT DISTINCT date FROM prices WHERE ticker IN ({placeholders})", chunk))
+            columns = [t for t in tickers if t in present]
+            date_keys = pd.Index(sorted(dates))
+            # Column-major, so each ticker is written to one contiguous block
+            values = np.full((len(date_keys), len(columns)), np.nan, dtype=dtype, order='F')
+            for position, ticker in enumerate(columns):
+                rows = conn.execute(f"SELECT date, {db_column} FROM prices WHERE ticker = ?", (ticker,)).fetchall()
+                ticker_dates, ticker_values = zip(*rows)
+                values[date_keys.get_indexer(ticker_dates), position] = np.array(ticker_values, dtype=float)
+        date_index = pd.DatetimeIndex(pd.to_datetime(date_keys, format='%Y-%m-%d'), name='Date')
+        return pd.DataFrame(values, index=date_index, columns=pd.Index(columns, name='ticker'), copy=False)
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+
+
+def _forward_fill(values):
+    """
+    Forward-fill the NaNs of a dates x tickers matrix along the dates, without leaving NumPy.
+    """
+    rows = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])]
+
+
+def _chunk_metrics(values, dates, cagr_years, risk_free):
+    valid = ~np.isnan(values)
+    has_data = valid.any(axis=0)
+    columns = np.arange(values.shape[1])
+    filled = _forward_fill(values)
+
+    # First and last close of every ticker
+    first_row = np.argmax(valid, axis=0)
+    last_row = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+    last_close = filled[last_row, columns]
+    last_date = dates[last_row]
+
+    metrics = {}
+    for years in cagr_years:
+        # Last close on or before the same day `years` earlier; NaN if the ticker was not listed yet
+        start_dates = (pd.DatetimeIndex(last_date) - pd.DateOffset(years=years)).to_numpy()
+        start_row = np.searchsorted(dates, start_dates, side='right') - 1
+        listed = (start_row >= first_row) & has_data
+        start_close = filled[np.clip(start_row, 0, None), columns]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cagr = (last_close / start_close) ** (1 / years) - 1
+        metrics[f"CAGR {years}Y"] = np.where(listed, cagr * 100, np.nan)
+
+    # Daily returns from the previous available close, NaN where the ticker has no close
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = filled[1:] / filled[:-1] - 1
+    returns[~valid[1:]] = np.nan
+    counts = (~np.isnan(returns)).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.nansum(returns, axis=0) / counts
+        variance = np.nansum((returns - mean) ** 2, axis=0) / (counts - 1)
+        volatility = np.sqrt(variance * TRADING_DAYS)
+        sharpe = (mean * TRADING_DAYS - risk_free) / volatility
+    enough = counts > 1
+    metrics['Volatility'] = np.where(enough, volatility * 100, np.nan)
+    metrics['Sharpe'] = np.where(enough & (volatility > 0), sharpe, np.nan)
+
+    # Deepest fall from a running peak (fmax skips the NaNs before the listing)
+    with np.errstate(invalid='ignore'):
+        drawdown = filled / np.fmax.accumulate(filled, axis=0) - 1
+    metrics['Max Drawdown'] = np.where(has_data, np.nanmin(np.where(np.isnan(drawdown), 0, drawdown), axis=0) * 100, np.nan)
+    return metrics
+
+
+def risk_metrics(close_panel, cagr_years=(3, 5, 10), risk_free=0.0, decimals=1, chunk_size=500):
+    """
+    Compute risk/return metrics of every ticker of a close panel with vectorized NumPy passes.
+
+    CAGR is measured back from each ticker's last close. Volatility (annualized), Sharpe and max
+    drawdown cover the whole history of the ticker in the panel. Tickers are processed in chunks
+    of columns, so a 5,000-ticker panel never needs more than a few float64 copies of one chunk.
+
+    Args:
+    - close_panel (pd.DataFrame): Dates x tickers closes (NaN where a ticker has no bar).
+    - cagr_years (list of int): CAGR horizons, in years.
+    - risk_free (float): Annual risk-free rate used by the Sharpe ratio (e.g. 0.04 for 4%).
+    - decimals (int): Rounding of the percentages (the Sharpe ratio gets one more decimal).
+    - chunk_size (int): Tickers processed per pass.
+
+    Returns:
+    - pd.DataFrame: Tickers x metrics ('CAGR 3Y', ..., 'Volatility', 'Max Drawdown' in percent, 'Sharpe'),
+      tickers without any close are left out.
+    """
+    dates = close_panel.index.to_numpy()
+    parts = []
+    for start in range(0, close_panel.shape[1], chunk_size):
+        chunk = close_panel.iloc[:, start:start + chunk_size]
+        metrics = _chunk_metrics(chunk.to_numpy(dtype='float64'), dates, cagr_years, risk_free)
+        parts.append(pd.DataFrame(metrics, index=chunk.columns))
+    columns = [f"CAGR {years}Y" for years in cagr_years] + ['Volatility', 'Max Drawdown', 'Sharpe']
+    result = pd.concat(parts) if parts else pd.DataFrame(columns=columns)
+    result = result[columns].dropna(how='all')
+    result = result.round({column: decimals + 1 if column == 'Sharpe' else decimals for column in columns})
+    result.index.name = 'Ticker'
+    return result
@@ -0,0 +1,112 @@
+import os
+import json
+import time
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+
+# Upper bounds of the latency histogram buckets, in seconds (the last bucket is open-ended)
+LATENCY_BUCKETS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+
+def latency_summary(seconds):
+    """
+    Summarize a list of per-request latencies: count, mean, percentiles and a histogram.
+
+    Args:
+    - seconds (list of float): Latencies in seconds.
+
+    Returns:
+    - dict: Summary, with the histogram as bucket label -> count.
+    """
+    values = np.asarray(list(seconds), dtype=float)
+    if len(values) == 0:
+        return {'count': 0}
+    counts = np.bincount(np.searchsorted(LATENCY_BUCKETS, values, side='left'), minlength=len(LATENCY_BUCKETS) + 1)
+    labels = [f"<={bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+    return {
+        'count': int(len(values)),
+        'total': round(float(values.sum()), 3),
+        'mean': round(float(values.mean()), 4),
+        'p50': round(float(np.percentile(values, 50)), 4),
+        'p90': round(float(np.percentile(values, 90)), 4),
+        'p99': round(float(np.percentile(values, 99)), 4),
+        'max': round(float(values.max()), 4),
+        'histogram': {label: int(count) for label, count in zip(labels, counts)},
+    }
+
+
+class RunProfile:
+    def __init__(self, name=None, profile_dir=None):
+        """
+        Wall-clock time of each stage of an analyzer run, and latency histograms of its requests.
+
+        Args:
+        - name (str): Name of the run (e.g. 'sp500'); None gives a disabled profile that records nothing.
+        - profile_dir (str): Folder of the JSON summaries (default is ~/.finance_cache/profiles).
+        """
+        self.name = name
+        self.profile_dir = profile_dir or os.path.join(os.path.expanduser('~/.finance_cache'), 'profiles')
+        self.started_at = datetime.now()
+        self._start = time.perf_counter()
+        self.stages = {}     # stage -> {'seconds': total, 'calls': count}, in first-run order
+        self.latencies = {}  # request name -> list of seconds
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Time a block of the run; a stage entered several times (e.g. once per report) is accumulated.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.name is not None:
+                entry = self.stages.setdefault(name, {'seconds': 0.0, 'calls': 0})
+                entry['seconds'] += time.perf_counter() - start
+                entry['calls'] += 1
+
+    def add_timings(self, timings):
+        """
+        Add per-request latencies, as kept in FetchEngine.timings or PriceCache.timings (name -> {key: seconds}).
+        """
+        if self.name is None:
+            return
+        for name, values in timings.items():
+            self.latencies.setdefault(name, []).extend(values.values())
+
+    def summary(self):
+        """
+        Return the profile as a JSON-serializable dict.
+        """
+        return {
+            'run': self.name,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'total_seconds': round(time.perf_counter() - self._start, 3),
+            'stages': {name: {'seconds': round(entry['seconds'], 3), 'calls': entry['calls']} for name, entry in self.stages.items()},
+            'latencies': {name: latency_summary(values) for name, values in self.latencies.items()},
+        }
+
+    def finish(self):
+        """
+        Print the stage times and write the JSON summary.
+
+        Returns:
+        - str: Path of the JSON file (None for a disabled profile).
+        """
+        if self.name is None:
+            return None
+        summary = self.summary()
+        print(f"Run time: {summary['total_seconds']:.1f}s")
+        for name, entry in summary['stages'].items():
+            print(f"  {name:<16}{entry['seconds']:>9.2f}s")
+        for name, stats in summary['latencies'].items():
+            if stats['count']:
+                print(f"  {name}: {stats['count']} requests, p50 {stats['p50']:.3f}s, p90 {stats['p90']:.3f}s, max {stats['max']:.3f}s")
+
+        os.makedirs(self.profile_dir, exist_ok=True)
+        path = os.path.join(self.profile_dir, f"{self.name}-{self.started_at.strftime('%Y%m%d-%H%M%S')}.json")
+        with open(path, 'w') as file:
+            json.dump(summary, file, indent=2)
+        print(f"Profile saved to {path}")
+        return path
@@ -0,0 +1,85 @@
+import os
+import re
+import json
+
+# Yahoo Finance exchange suffixes (e.g. 2357.TW, 6503.T, REY.MI): the dot is part of the symbol
+EXCHANGE_SUFFIXES = {
+    'AS', 'AT', 'AX', 'BA', 'BE', 'BK', 'BO', 'BR', 'CN', 'CO', 'DE', 'DU', 'F', 'HE', 'HK', 'HM', 'IL',
+    'IR', 'IS', 'JK', 'JO', 'KL', 'KQ', 'KS', 'L', 'LS', 'MC', 'ME', 'MI', 'MU', 'MX', 'NE', 'NS', 'NZ',
+    'OL', 'PA', 'PR', 'SA', 'SG', 'SI', 'SR', 'SS', 'ST', 'SW', 'SZ', 'T', 'TA', 'TO', 'TW', 'TWO', 'V',
+    'VI', 'WA',
+}
+
+# Share classes are one or two letters after the dot (BRK.B, BF.B, MOG.A); Yahoo writes them with a dash
+SHARE_CLASS = re.compile(r'^([A-Z0-9&]+)\.([A-Z]{1,2})$')
+VALID_SYMBOL = re.compile(r'^[A-Z0-9&^=-]+(\.[A-Z]{1,3})?$')
+
+
+def normalize_symbol(symbol):
+    """
+    Convert a listing symbol to its Yahoo Finance form, without any request.
+
+    Exchange suffixes are kept (2357.TW, REY.MI), share-class dots become dashes (BRK.B -> BRK-B).
+
+    Args:
+    - symbol (str): Symbol as written in the source list.
+
+    Returns:
+    - str: Yahoo symbol, or None if the symbol is malformed.
+    """
+    symbol = symbol.strip().upper()
+    if '.' in symbol:
+        base, suffix = symbol.rsplit('.', 1)
+        if suffix not in EXCHANGE_SUFFIXES and SHARE_CLASS.match(symbol):
+            symbol = f"{base}-{suffix}"
+    return symbol if VALID_SYMBOL.match(symbol) else None
+
+
+class SymbolResolver:
+    def __init__(self, cache_path=None):
+        """
+        Resolve listing symbols to Yahoo symbols, remembering every resolution in a JSON file.
+
+        The file can also be edited by hand to map a symbol that the rules get wrong
+        (e.g. "XYZ.L": "XYZ-L"), or to null to drop it.
+
+        Args:
+        - cache_path (str): Path of the JSON file (default is ~/.finance_cache/symbols.json).
+        """
+        self.cache_path = cache_path or os.path.join(os.path.expanduser('~/.finance_cache'), 'symbols.json')
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        self._resolved = {}
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path, 'r') as file:
+                self._resolved = json.load(file)
+
+    def resolve(self, symbol):
+        """
+        Return the Yahoo symbol of a listing symbol (None if it is malformed).
+        """
+        if symbol not in self._resolved:
+            self._resolved[symbol] = normalize_symbol(symbol)
+        return self._resolved[symbol]
+
+    def resolve_many(self, symbols):
+        """
+        Resolve a list of symbols, dropping the malformed ones, and save the new resolutions.
+
+        Args:
+        - symbols (list of str): Symbols as written in the source list.
+
+        Returns:
+        - dict: listing symbol -> Yahoo symbol, in the order of the list
+        """
+        known = len(self._resolved)
+        resolved = {}
+        for symbol in symbols:
+            canonical = self.resolve(symbol)
+            if canonical is None:
+                print(f"Malformed symbol {symbol!r}. Skipping.")
+            else:
+                resolved[symbol] = canonical
+        if len(self._resolved) != known:
+            with open(self.cache_path, 'w') as file:
+                json.dump(self._resolved, file, indent=2, sort_keys=True)
+        return resolved
@@ -0,0 +1,116 @@
+import os
+import sys
+import argparse
+
+# Shared finance helpers live in src/finance_common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'finance_common'))
+from price_cache import PriceCache
+from fetch_engine import FetchEngine, TokenBucket
+from market_data import get_provider
+from checkpoint import RunCheckpoint
+from growth_panel import yearly_growth, period_growth
+from risk_metrics import risk_metrics
+from panel_store import save_panel
+from fx import convert_panel, convert_amounts
+from run_profile import RunProfile
+from index_reports import (
+    add_fetch_arguments, index_constituents, watchlist_tickers, load_close_panel, read_close_panel, to_base_currency, tickers_with_data, fetch_market_caps,
+    fetch_company_names, etf_baskets, write_market_cap_report, write_etf_report, period_file_name,
+    PRICE_MODES, SP500_SOURCE, NASDAQ100_SOURCE, QUANTUM_TICKERS, SP500_FILE, NASDAQ100_FILE, QUANTUM_FILE
+)
+
+parser = argparse.ArgumentParser(description="Yearly growth heatmaps of the S&P 500, the NASDAQ-100 and the quantum list in one run, fetching each ticker once.")
+add_fetch_arguments(parser)
+parser.add_argument("--sp500-price-mode", choices=PRICE_MODES, help="Price mode of the S&P 500 report (default is --price-mode)")
+parser.add_argument("--nasdaq-price-mode", choices=PRICE_MODES, help="Price mode of the NASDAQ-100 report (default is --price-mode)")
+parser.add_argument("--quantum-price-mode", choices=PRICE_MODES, help="Price mode of the quantum report (default is --price-mode)")
+args = parser.parse_args()
+sp500_mode = args.sp500_price_mode or args.price_mode
+nasdaq_mode = args.nasdaq_price_mode or args.price_mode
+quantum_mode = args.quantum_price_mode or args.price_mode
+
+# Wall-clock time of every stage and request latencies, saved as JSON at the end of the run
+profile = RunProfile('all_indexes')
+
+# Step 1: Define the range of years
+years = list(range(1990, 2025))
+
+# Constituents of the three reports
+with profile.stage('constituents'):
+    sp500_tickers, sp500_names = index_constituents(SP500_SOURCE, refresh=args.refresh_constituents)
+    nasdaq_tickers, nasdaq_names = index_constituents(NASDAQ100_SOURCE, refresh=args.refresh_constituents)
+    quantum_tickers = watchlist_tickers(QUANTUM_TICKERS)
+
+# Most NASDAQ-100 names are also in the S&P 500, and the quantum list overlaps both:
+# the union is fetched once and every report reads its columns from the shared panel
+all_tickers = list(dict.fromkeys(sp500_tickers + nasdaq_tickers + quantum_tickers))
+listed = len(sp500_tickers) + len(nasdaq_tickers) + len(quantum_tickers)
+print(f"{len(all_tickers)} distinct tickers across the three reports ({listed} listed)")
+
+# Local store of daily bars, refreshed incrementally on every run
+# All requests share one rate limiter, so the worker threads stay under Yahoo's throttling
+provider = get_provider(args.replay, args.replay_latency)
+limiter = TokenBucket(rate=args.rate)
+price_cache = PriceCache(limiter=limiter, provider=provider, negative_ttl_hours=args.dead_ticker_ttl, retries=args.retries)
+fetch_engine = FetchEngine(max_workers=args.workers, limiter=limiter, retries=args.retries)
+
+# Per-ticker progress is checkpointed on disk, so --resume can pick up an interrupted run
+checkpoint = RunCheckpoint('all_indexes', resume=args.resume)
+
+# Step 2: Gather the daily closes, market caps and company names, each ticker once
+with profile.stage('history'):
+    close_panel = load_close_panel(all_tickers, price_cache, fetch_engine, checkpoint, args.batch_size, args.price_mode)
+# Closes in --currency: one cached FX series per foreign currency, applied to all its tickers at once
+with profile.stage('fx'):
+    close_panel, fx_closes = to_base_currency(close_panel, args.currency, price_cache, fetch_engine, checkpoint, args.batch_size)
+# Reports with another price mode read their panel from the same cached bars, without any request
+panels = {args.price_mode: close_panel}
+for mode in dict.fromkeys([sp500_mode, nasdaq_mode, quantum_mode]):
+    if mode not in panels:
+        with profile.stage('history'):
+            panels[mode] = read_close_panel(all_tickers, price_cache, mode)
+        with profile.stage('fx'):
+            panels[mode] = convert_panel(panels[mode], fx_closes, args.currency) if fx_closes is not None else panels[mode]
+# Memory-mapped copy of the closes and daily returns, for other processes (screeners, backtests)
+with profile.stage('panel_store'):
+    save_panel('all_indexes', close_panel)
+available = set(tickers_with_data(close_panel, all_tickers))
+# The quantum list needs market caps too, for its cap-weighted basket
+cap_tickers = [ticker for ticker in all_tickers if ticker in available]
+with profile.stage('market_cap'):
+    market_caps = fetch_market_caps(cap_tickers, provider, fetch_engine, checkpoint)
+    market_caps = convert_amounts(market_caps, fx_closes, args.currency)
+with profile.stage('company_names'):
+    quantum_names = fetch_company_names(quantum_tickers, provider, fetch_engine, checkpoint)
+
+# Step 3: Yearly growth of the whole panel of each price mode at once (Yahoo's 'Adj Close' by default),
+# fanned out to the three reports
+with profile.stage('compute'):
+    growth = {mode: yearly_growth(panel, years) for mode, panel in panels.items()}
+    # CAGR 3/5/10Y, volatility, max drawdown and Sharpe of every ticker, in one vectorized pass
+    risk = {mode: risk_metrics(panel, risk_free=args.risk_free / 100) for mode, panel in panels.items()}
+    # Daily simulation of the quantum baskets, rebalanced at --rebalance
+    quantum_available = [ticker for ticker in quantum_tickers if ticker in available]
+    quantum_baskets = etf_baskets(panels[quantum_mode], quantum_available, market_caps, years, args.rebalance)
+
+def report_growth(mode, tickers):
+    return growth[mode].loc[[ticker for ticker in tickers if ticker in growth[mode].index]]
+
+write_market_cap_report(SP500_FILE, report_growth(sp500_mode, sp500_tickers), sp500_names, market_caps, args.columnar, risk=risk[sp500_mode], profile=profile)
+write_market_cap_report(NASDAQ100_FILE, report_growth(nasdaq_mode, nasdaq_tickers), nasdaq_names, market_caps, args.columnar, risk=risk[nasdaq_mode], profile=profile)
+write_etf_report(QUANTUM_FILE, report_growth(quantum_mode, quantum_tickers), quantum_names, args.columnar, baskets=quantum_baskets, risk=risk[quantum_mode], profile=profile)
+
+# Quarterly/monthly heatmaps of the three reports from the same daily closes (--granularity)
+for granularity in args.granularity:
+    with profile.stage('compute'):
+        growth = {mode: period_growth(panel, granularity, years) for mode, panel in panels.items()}
+        quantum_baskets = etf_baskets(panels[quantum_mode], quantum_available, market_caps, years, args.rebalance, granularity)
+    write_market_cap_report(period_file_name(SP500_FILE, granularity), report_growth(sp500_mode, sp500_tickers), sp500_names, market_caps, args.columnar, profile=profile)
+    write_market_cap_report(period_file_name(NASDAQ100_FILE, granularity), report_growth(nasdaq_mode, nasdaq_tickers), nasdaq_names, market_caps, args.columnar, profile=profile)
+    write_etf_report(period_file_name(QUANTUM_FILE, granularity), report_growth(quantum_mode, quantum_tickers), quantum_names, args.columnar, baskets=quantum_baskets, profile=profile)
+
+checkpoint.finish()
+
+profile.add_timings(fetch_engine.timings)
+profile.add_timings(price_cache.timings)
+profile.finish()
@@ -0,0 +1,174 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import multiprocessing
+import numpy as np
+import pandas as pd
+
+# Shared finance helpers live in src/finance_common
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'finance_common'))
+from price_cache import PriceCache
+from market_data import ReplayProvider
+from growth_panel import yearly_growth
+from risk_metrics import risk_metrics
+from index_reports import market_cap_table, save_report
+from run_profile import RunProfile
+
+YEARS = list(range(1990, 2025))
+
+
+def peak_rss_mb():
+    """
+    Return the peak resident memory of the current process so far, in MB.
+    """
+    try:
+        import resource
+    except ImportError:
+        # Windows has no resource module; psutil exposes the peak working set instead
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024  # Bytes on macOS, KB on Linux
+
+
+def synthetic_close_panel(tickers, start='1990-01-01', end='2024-12-31', seed=0, chunk_size=500):
+    """
+    Generate a float32 dates x tickers panel of random-walk closes, like PriceCache.close_panel returns.
+
+    Tickers list at random dates (NaN before), so the panel has the gaps of a real universe.
+
+    Args:
+    - tickers (list of str): Column names.
+    - start (str): First date.
+    - end (str): Last date.
+    - seed (int): Random seed; the same seed always gives the same panel.
+    - chunk_size (int): Columns generated at a time.
+
+    Returns:
+    - pd.DataFrame: Dates x tickers closes.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, end, name='Date')
+    values = np.empty((len(dates), len(tickers)), dtype='float32', order='F')
+    for first in range(0, len(tickers), chunk_size):
+        count = min(chunk_size, len(tickers) - first)
+        drift = rng.uniform(-0.0002, 0.0008, count)
+        volatility = rng.uniform(0.01, 0.03, count)
+        returns = rng.standard_normal((len(dates), count)) * volatility + drift
+        closes = rng.uniform(5, 200, count) * np.exp(np.cumsum(returns, axis=0))
+        listed = rng.integers(0, len(dates) // 2, count)
+        closes[np.arange(len(dates))[:, None] < listed] = np.nan
+        values[:, first:first + count] = closes
+    return pd.DataFrame(values, index=dates, columns=pd.Index(tickers, name='ticker'), copy=False)
+
+
+def run_benchmark(n_tickers, with_cache=False, seed=0, columnar=('parquet',)):
+    """
+    Run Steps 2-4 of the index analyzers on a synthetic universe and measure every stage.
+
+    Runs in its own process (see main), so the peak RSS belongs to this universe size alone.
+
+    Args:
+    - n_tickers (int): Number of synthetic tickers.
+    - with_cache (bool): Build the panel through PriceCache (store + close_panel) from the replay provider,
+      instead of generating it in memory. Much slower, but it measures the Step 2 code too.
+    - seed (int): Random seed of the universe.
+    - columnar (list of str): Columnar formats written next to the Excel file.
+
+    Returns:
+    - dict: Wall time and peak RSS after each stage, and totals.
+    """
+    profile = RunProfile(f"bench_{n_tickers}")
+    peaks = {}
+    tickers = [f"SYN{i:05d}" for i in range(n_tickers)]
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as work_dir:
+        if with_cache:
+            price_cache = PriceCache(cache_dir=work_dir, provider=ReplayProvider())
+            with profile.stage('cache_update'):
+                price_cache.update_many(tickers)
+            peaks['cache_update'] = peak_rss_mb()
+            with profile.stage('close_panel'):
+                close_panel = price_cache.close_panel(tickers)
+            peaks['close_panel'] = peak_rss_mb()
+        else:
+            with profile.stage('generate'):
+                close_panel = synthetic_close_panel(tickers, seed=seed)
+            peaks['generate'] = peak_rss_mb()
+
+        with profile.stage('compute'):
+            growth = yearly_growth(close_panel, YEARS)
+            risk = risk_metrics(close_panel)
+        peaks['compute'] = peak_rss_mb()
+
+        rng = np.random.default_rng(seed)
+        market_caps = dict(zip(tickers, rng.uniform(1e8, 3e12, n_tickers)))
+        names = {ticker: f"{ticker} Synthetic Corp" for ticker in tickers}
+        with profile.stage('assembly'):
+            df, columnar_df = market_cap_table(growth, names, market_caps)
+        peaks['assembly'] = peak_rss_mb()
+
+        # Excel write (with the Risk sheet), styling and columnar write, timed inside save_report
+        save_report(os.path.join(work_dir, 'Bench_Annual_Growth.xlsx'), df, columnar_df, 4, columnar, risk=risk, profile=profile)
+        peaks['export'] = peak_rss_mb()
+
+    summary = profile.summary()
+    return {
+        'tickers': n_tickers,
+        'dates': len(close_panel),
+        'with_cache': with_cache,
+        'wall_seconds': round(time.perf_counter() - start, 3),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'stages': {name: entry['seconds'] for name, entry in summary['stages'].items()},
+        'peak_rss_after_mb': {name: round(peak, 1) for name, peak in peaks.items()},
+    }
+
+
+def print_results(results, baseline=None):
+    """
+    Print one line per universe size, with the change against a previous run when given.
+    """
+    previous = {(entry['tickers'], entry['with_cache']): entry for entry in (baseline or {}).get('results', [])}
+    for entry in results:
+        line = f"{entry['tickers']:>6} tickers: {entry['wall_seconds']:>8.2f}s, peak RSS {entry['peak_rss_mb']:>8.1f} MB"
+        old = previous.get((entry['tickers'], entry['with_cache']))
+        if old:
+            line += (f"  (was {old['wall_seconds']:.2f}s / {old['peak_rss_mb']:.1f} MB:"
+                     f" {entry['wall_seconds'] / old['wall_seconds'] - 1:+.0%} time, {entry['peak_rss_mb'] / old['peak_rss_mb'] - 1:+.0%} memory)")
+        print(line)
+        print('        ' + ', '.join(f"{name} {seconds:.2f}s" for name, seconds in entry['stages'].items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the index analyzer pipeline (Steps 2-4) offline on synthetic universes.")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[100, 500, 5000], help="Universe sizes (number of tickers)")
+    parser.add_argument("--with-cache", action="store_true", help="Build the panel through PriceCache from the replay provider (slow, includes Step 2)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed of the synthetic universes")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file receiving the results")
+    parser.add_argument("--compare", metavar="JSON", help="Results of a previous run to compare against")
+    args = parser.parse_args()
+
+    results = []
+    for n_tickers in args.sizes:
+        print(f"Benchmarking {n_tickers} tickers...")
+        # A fresh process per size, so each peak RSS is measured on its own
+        with multiprocessing.get_context('spawn').Pool(1) as pool:
+            results.append(pool.apply(run_benchmark, (n_tickers, args.with_cache, args.seed)))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+
+    with open(args.output, 'w') as file:
+        json.dump({'python': sys.version.split()[0], 'pandas': pd.__version__, 'numpy': np.__version__,
+                   'seed': args.seed, 'results': results}, file, indent=2)
+    print(f"Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()